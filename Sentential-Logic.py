@@ -2,66 +2,155 @@
 #one or two branches (negation has one branch, binary connectives have left and right branches), and bottom nodes
 #corresponding to atomic sentence variables or truth-values
 
+import weakref
+import threading
+
+#formulas are hash-consed: every node is created through the tables below, so structurally identical formulas are always one 
+#and the same object; two formulas are therefore equal exactly if they are identical, and each node carries a hash computed once
+#(in constant time) from the hashes of its branches, which lets formulas serve as dictionary and set keys; the node classes 
+#declare __slots__ so that nodes have no per-instance dictionary (see FormulaArena below for a much more compact representation)
+#
+#the tables map each node's key to a weak reference to the node, so that nodes no longer used anywhere else are freed; there is
+#one table for negations, keyed by the id() of the negated formula, one for atomic formulas, keyed by name, and one for binary 
+#connectives, keyed by the class and the ids of the branches (the two truth-values are made once and kept for good); keying by 
+#id() is safe since a live node keeps its branches alive, so the ids in its key cannot be reused while it exists (and a key 
+#whose node has been freed only leads to a dead reference, which is replaced), and it means that looking a key up never has to
+#call the __hash__ methods of the branches; every node of every parsed formula goes through here, so these are plain 
+#dictionaries of plain weak references rather than weakref.WeakValueDictionary, whose callbacks would cost a Python call for 
+#every freed node: instead the entries of freed nodes are swept out whenever a table has doubled in size since its last sweep,
+#which takes constant time per node on average; leaves and negations are looked up without building a tuple, and each class
+#below looks its key up and sets its fields directly
+class NodeTable(dict):
+    __slots__ = ('limit',)
+    def __init__(self):
+        self.limit = 1024
+
+formulaTable = NodeTable()
+negationTable = NodeTable()
+variableTable = NodeTable()
+
+#the tables are shared by every thread (see LogicServer below), so nodes are entered with setdefault, which enters a node in a 
+#single step unless another thread has just entered the same one; taking the place of a freed node, and sweeping, are done 
+#while holding this lock, so that neither can undo the other
+tableLock = threading.Lock()
+
+#this function enters a new node (whose fields and hash have been set) into a table under its key and returns it, or returns 
+#the node another thread has entered under the same key in the meantime
+def addNode(table, key, node):
+    ref = weakref.ref(node)
+    if table.setdefault(key, ref) is ref:
+        if len(table) > table.limit:
+            sweepTable(table)
+        return node
+    with tableLock:
+        other = table.get(key)
+        other = None if other is None else other()
+        if other is not None:
+            return other
+        table[key] = ref
+        return node
+
+#this function removes the entries of freed nodes from a table
+def sweepTable(table):
+    with tableLock:
+        for (key, ref) in list(table.items()):
+            if ref() is None:
+                del table[key]
+        table.limit = max(2 * len(table), 1024)
+
 class Not:
+    __slots__ = ('formula', 'hash', '__weakref__')
     opStr = '~'
-    def __init__(self, formula):
-        self.formula = formula
+    def __new__(cls, formula):
+        key = id(formula)
+        ref = negationTable.get(key)
+        node = None if ref is None else ref()
+        if node is None:
+            node = object.__new__(cls)
+            node.formula = formula
+            node.hash = hash((cls, formula.hash))
+            node = addNode(negationTable, key, node)
+        return node
+    def __hash__(self):
+        return self.hash
+    #pickling rebuilds the node through the table so that unpickled formulas are shared as well
+    def __reduce__(self):
+        return (type(self), (self.formula,))
         
-    #negations are represented in the form '~p'
+    #negations are represented in the form '~p' (see formulaText below)
     def __str__(self):
-        return self.opStr + str(self.formula)
+        return formulaText(self)
     def __repr__(self):
         return str(self)
     
     #a negation is true exactly if its main subformula is false, and the eval function treats it accordingly; here 'env' is
     #a dictionary containing assignments of truth-values to atomic formulas
     def eval(self, env):
-        if self.formula.eval(env) == None:
+        value = self.formula.eval(env)
+        if value == None:
             return None
         else:
-            return not self.formula.eval(env)
+            return not value
         
 #this is the main class for binary connectives, which have both left and right branches (corresponding to their left and right
 #subformulas)
 class BinaryOp:
-    def __init__(self, left, right):
-        self.left = left
-        self.right = right
+    __slots__ = ('left', 'right', 'hash', '__weakref__')
+    def __new__(cls, left, right):
+        key = (cls, id(left), id(right))
+        ref = formulaTable.get(key)
+        node = None if ref is None else ref()
+        if node is None:
+            node = object.__new__(cls)
+            node.left = left
+            node.right = right
+            node.hash = hash((cls, left.hash, right.hash))
+            node = addNode(formulaTable, key, node)
+        return node
+    def __hash__(self):
+        return self.hash
+    def __reduce__(self):
+        return (type(self), (self.left, self.right))
         
     #all binary connectives * are represented in the form '(p * q)'
     def __str__(self):
-        return '(' + str(self.left) + ' ' + self.opStr + ' ' + \
-               str(self.right) + ')'
+        return formulaText(self)
     def __repr__(self):
         return str(self)
     
 class And(BinaryOp): 
+    __slots__ = ()
     opStr = '^'
     #a conjunction is true exactly if both conjuncts are true
     def eval(self, env):
         return self.left.eval(env) and self.right.eval(env)
     
 class Or(BinaryOp): 
+    __slots__ = ()
     opStr = 'v'
     #a disjunction is true exactly if either the first disjunct is true or the second disjunct is true or both
     def eval(self, env):
         return self.left.eval(env) or self.right.eval(env)
     
 class Implies(BinaryOp):
+    __slots__ = ()
     opStr = '>'
     #a material conditional is true exactly if the conjunction of the antecedent and the negation of the consequent is false
     def eval(self, env):
         return not(self.left.eval(env) and not(self.right.eval(env)))
     
 class Bicond(BinaryOp):
+    __slots__ = ()
     opStr = '='
     #a biconditional is true exactly if either both sides are true or both sides are false
     def eval(self, env):
-        return (self.left.eval(env) and self.right.eval(env)) or \
-               (not(self.left.eval(env)) and not(self.right.eval(env)))
+        left = self.left.eval(env)
+        right = self.right.eval(env)
+        return (left and right) or (not(left) and not(right))
         
 #this is a special class for assigning truth-values to atomic sentence variables
 class Assign(BinaryOp):
+    __slots__ = ()
     opStr = ':'
     #the eval function modifies the environment 'env' (a dictionary) by assigning the truth-value specified to the atomic
     #formula, e.g. '(p : T)' when evaluated assigns the truth-value T to atomic formula 'p'
@@ -71,8 +160,20 @@ class Assign(BinaryOp):
         
 #this class handles atomic sentence variables, which are strings of letters and numbers
 class Variable:
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ('name', 'hash', '__weakref__')
+    def __new__(cls, name):
+        ref = variableTable.get(name)
+        node = None if ref is None else ref()
+        if node is None:
+            node = object.__new__(cls)
+            node.name = name
+            node.hash = hash((cls, name))
+            node = addNode(variableTable, name, node)
+        return node
+    def __hash__(self):
+        return self.hash
+    def __reduce__(self):
+        return (type(self), (self.name,))
     def __str__(self):
         return str(self.name)
     __repr__ = __str__
@@ -86,8 +187,13 @@ class Variable:
             
 #this is a class for the two truth-values: True and False
 class TruthValue:
-    def __init__(self, value):
-        self.value = value
+    __slots__ = ('value', 'hash', '__weakref__')
+    def __new__(cls, value):
+        return truthValues[bool(value)]
+    def __hash__(self):
+        return self.hash
+    def __reduce__(self):
+        return (type(self), (self.value,))
     def __str__(self):
         if self.value == True:
             return 'T'
@@ -96,38 +202,375 @@ class TruthValue:
     __repr__ = __str__
     def eval(self, env):
         return self.value
+
+#the two truth-values, F and T, are made once by this function and kept for good
+def makeTruthValue(value):
+    node = object.__new__(TruthValue)
+    node.value = value
+    node.hash = hash((TruthValue, value))
+    return node
+
+truthValues = (makeTruthValue(False), makeTruthValue(True))
     
+#this function returns the printed form of a formula, e.g. '(p ^ ~q)'; rather than building a new string for every subformula it
+#collects the pieces with an explicit stack and joins them once, so printing takes linear time however long or deeply nested 
+#the formula is
+def formulaText(formula):
+    pieces = []
+    stack = [formula]
+    while stack:
+        item = stack.pop()
+        if type(item) == str:
+            pieces.append(item)
+        elif type(item) == Not:
+            pieces.append(item.opStr)
+            stack.append(item.formula)
+        elif isinstance(item, BinaryOp):
+            pieces.append('(')
+            stack.extend([')', item.right, ' ' + item.opStr + ' ', item.left])
+        else:
+            pieces.append(str(item))
+    return ''.join(pieces)
+
+#this function returns the names of the atomic sentence variables occurring in a formula, in order of first occurrence from left 
+#to right (each name is listed once)
+def variablesOf(formula):
+    names = []
+    seen = set()
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        if type(node) == Variable:
+            names.append(node.name)
+        elif type(node) == Not:
+            stack.append(node.formula)
+        elif isinstance(node, BinaryOp):
+            stack.append(node.right)
+            stack.append(node.left)
+    return names
+
+#this function returns whether a formula contains an assignment anywhere in it; such a formula changes the environment rather 
+#than just having a truth-value in it, so it cannot be compiled, evaluated in bulk, tabled or converted into clauses
+def hasAssignment(formula):
+    seen = set()
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        if type(node) == Assign:
+            return True
+        elif type(node) == Not:
+            stack.append(node.formula)
+        elif isinstance(node, BinaryOp):
+            stack.append(node.right)
+            stack.append(node.left)
+    return False
+
+#these are the Python expressions computing each connective from the (already computed) values of its branches, matching the 
+#eval methods above (the negation of None, i.e. of an unknown truth-value, is None as in Not.eval)
+compiledOps = {Not: '(None if %s is None else not %s)', And: '%s and %s', Or: '%s or %s', Implies: 'not(%s and not(%s))',
+               Bicond: '(%s and %s) or (not(%s) and not(%s))'}
+
+#this function compiles a formula into a single flat Python function which evaluates every distinct subformula exactly once 
+#(identical subformulas are shared, see above), avoiding a method call per node on every evaluation; by default the function 
+#takes an environment dictionary like eval, but if 'slots' is a list of variable names it instead takes a tuple (or list, or 
+#array) of truth-values in that order; unlike eval, an unassigned variable raises a KeyError (or IndexError) instead of 
+#printing a message, and a formula containing an assignment (which modifies the environment) or a variable missing from 
+#'slots' raises a ValueError
+def compileFormula(formula, slots=None):
+    if slots != None:
+        slots = list(slots)
+        position = dict((name, n) for (n, name) in enumerate(slots))
+    names = {}
+    lines = []
+    #the subformulas are visited in postorder with an explicit stack, so that each line only refers to earlier lines
+    stack = [(formula, False)]
+    while stack:
+        (node, ready) = stack.pop()
+        if node in names:
+            continue
+        if type(node) == Not:
+            branches = [node.formula]
+        elif isinstance(node, BinaryOp):
+            branches = [node.left, node.right]
+        else:
+            branches = []
+        if not ready and branches:
+            stack.append((node, True))
+            for branch in reversed(branches):
+                stack.append((branch, False))
+            continue
+        if type(node) == Variable:
+            if slots == None:
+                expression = 'env[%r]' % node.name
+            elif node.name in position:
+                expression = 'env[%d]' % position[node.name]
+            else:
+                raise ValueError('Atomic formula %s has no slot.' % node.name)
+        elif type(node) == TruthValue:
+            expression = repr(node.value)
+        elif type(node) == Not:
+            expression = compiledOps[Not] % (names[node.formula], names[node.formula])
+        elif type(node) == Bicond:
+            expression = compiledOps[Bicond] % (names[node.left], names[node.right], names[node.left], names[node.right])
+        elif type(node) in compiledOps:
+            expression = compiledOps[type(node)] % tuple(names[branch] for branch in branches)
+        else:
+            raise ValueError('Assignments cannot be compiled.')
+        names[node] = 'v%d' % len(names)
+        lines.append('    %s = %s\n' % (names[node], expression))
+    source = 'def compiled(env):\n' + ''.join(lines) + '    return %s\n' % names[formula]
+    namespace = {}
+    exec(source, namespace)
+    compiled = namespace['compiled']
+    compiled.slots = slots
+    return compiled
+
+#the truth-table functions below are bit-parallel: the 2^n assignments to a formula's n variables are numbered so that the j-th 
+#variable is true in assignment i exactly if bit j of i is set, and a whole column of a truth table is stored as the bits of a 
+#single Python integer; every connective then becomes one bitwise operation over all the assignments at once; the assignments 
+#are processed in chunks of 2^chunkBits, where the first chunkBits variables vary within a chunk and the remaining variables are 
+#fixed by the chunk number, so the memory used stays bounded however many variables there are
+
+#this function flattens a formula into a list of steps (kind, a, b) in postorder, each step referring to earlier steps by 
+#position, together with the positions whose values can be discarded after each step
+def tableProgram(formula, order):
+    position = dict((name, n) for (n, name) in enumerate(order))
+    steps = {}
+    program = []
+    stack = [(formula, False)]
+    while stack:
+        (node, ready) = stack.pop()
+        if node in steps:
+            continue
+        if type(node) == Not:
+            branches = [node.formula]
+        elif isinstance(node, BinaryOp):
+            branches = [node.left, node.right]
+        else:
+            branches = []
+        if not ready and branches:
+            stack.append((node, True))
+            for branch in reversed(branches):
+                stack.append((branch, False))
+            continue
+        if type(node) == Assign:
+            return None
+        elif type(node) == Variable:
+            program.append((Variable, position[node.name], None))
+        elif type(node) == TruthValue:
+            program.append((TruthValue, node.value, None))
+        else:
+            program.append((type(node),) + tuple(steps[branch] for branch in branches) + (None,) * (2 - len(branches)))
+        steps[node] = len(program) - 1
+    lastUse = {}
+    for (n, (kind, a, b)) in enumerate(program):
+        if not kind in (Variable, TruthValue):
+            lastUse[a] = n
+            if b != None:
+                lastUse[b] = n
+    frees = [[] for step in program]
+    for a in lastUse:
+        frees[lastUse[a]].append(a)
+    return (program, frees)
+
+#this function returns the column of the j-th variable over a chunk of 2^chunkBits assignments: 2^j false rows followed by 2^j 
+#true rows, repeated
+def variableColumn(j, chunkBits):
+    block = ((1 << (1 << j)) - 1) << (1 << j)
+    return block * (((1 << (1 << chunkBits)) - 1) // ((1 << (2 << j)) - 1))
+
+#this function yields a triple (chunk, width, bits) for every chunk of assignments, where bit i of 'bits' is the truth-value of
+#the formula under assignment number chunk * width + i; 'order' is the list of variable names (variablesOf by default) and
+#'chunks' may restrict the chunk numbers visited; it raises ValueError for a formula containing an assignment, which has no
+#truth table (so that countModels, isValid and isSatisfiable do not answer as if the table were empty)
+def tableChunks(formula, order=None, chunkBits=16, chunks=None):
+    if order == None:
+        order = variablesOf(formula)
+    compiled = tableProgram(formula, order)
+    if compiled == None:
+        raise ValueError('Assignments do not have truth tables.')
+    (program, frees) = compiled
+    chunkBits = min(chunkBits, len(order))
+    width = 1 << chunkBits
+    mask = (1 << width) - 1
+    columns = [variableColumn(j, chunkBits) for j in range(chunkBits)]
+    if chunks == None:
+        chunks = range(1 << (len(order) - chunkBits))
+    for chunk in chunks:
+        values = [None] * len(program)
+        for (n, (kind, a, b)) in enumerate(program):
+            if kind == Variable:
+                if a < chunkBits:
+                    values[n] = columns[a]
+                elif (chunk >> (a - chunkBits)) & 1:
+                    values[n] = mask
+                else:
+                    values[n] = 0
+            elif kind == TruthValue:
+                values[n] = mask if a else 0
+            elif kind == Not:
+                values[n] = mask ^ values[a]
+            elif kind == And:
+                values[n] = values[a] & values[b]
+            elif kind == Or:
+                values[n] = values[a] | values[b]
+            elif kind == Implies:
+                values[n] = (mask ^ values[a]) | values[b]
+            else:
+                values[n] = mask ^ values[a] ^ values[b]
+            for m in frees[n]:
+                values[m] = None
+        yield (chunk, width, values[-1])
+
+#this function yields every row of the truth table of a formula as a pair (env, value), where env is a dictionary assigning 
+#truth-values to the formula's variables
+def truthTable(formula, order=None):
+    if order == None:
+        order = variablesOf(formula)
+    for (chunk, width, bits) in tableChunks(formula, order):
+        for i in range(width):
+            index = chunk * width + i
+            env = dict((name, bool((index >> j) & 1)) for (j, name) in enumerate(order))
+            yield (env, bool((bits >> i) & 1))
+
+#this function returns the number of assignments to the formula's variables under which the formula is true; with workers > 1 
+#the assignments are split between that many processes (see tableParallel below)
+def countModels(formula, workers=1):
+    if workers > 1:
+        return tableParallel(formula, 'count', workers)
+    return sum(bin(bits).count('1') for (chunk, width, bits) in tableChunks(formula))
+
+#a formula is valid (a tautology) if it is true under every assignment, and satisfiable if it is true under at least one; both 
+#functions stop at the first chunk that settles the question (in every process, if workers > 1)
+def isValid(formula, workers=1):
+    if workers > 1:
+        return tableParallel(formula, 'valid', workers)
+    for (chunk, width, bits) in tableChunks(formula):
+        if bits != (1 << width) - 1:
+            return False
+    return True
+
+def isSatisfiable(formula, workers=1):
+    if workers > 1:
+        return tableParallel(formula, 'satisfiable', workers)
+    for (chunk, width, bits) in tableChunks(formula):
+        if bits != 0:
+            return True
+    return False
+
+#the functions below share the chunks of a truth table between worker processes; each chunk fixes the values of the variables 
+#after the first chunkBits, so a task is a range of chunk numbers, i.e. of assignments to those variables; the formula is sent 
+#to each worker once, when the worker starts, as a FormulaArena (a few bytes per node) rather than as formula objects
+
+#the formula, variable order and chunk size of a worker process, set by tableWorkerSetup
+tableWorkerState = {}
+
+def tableWorkerSetup(arena, root, order, chunkBits):
+    tableWorkerState['formula'] = arena.toFormula(root)
+    tableWorkerState['order'] = order
+    tableWorkerState['chunkBits'] = chunkBits
+
+#this function works through the chunks start..stop-1 and returns the number of models in them (for 'count'), or whether they 
+#are all true (for 'valid') or not all false (for 'satisfiable'), stopping early once that is settled
+def tableWorkerTask(task):
+    (kind, start, stop) = task
+    count = 0
+    for (chunk, width, bits) in tableChunks(tableWorkerState['formula'], tableWorkerState['order'],
+                                            tableWorkerState['chunkBits'], range(start, stop)):
+        if kind == 'count':
+            count += bin(bits).count('1')
+        elif kind == 'valid' and bits != (1 << width) - 1:
+            return False
+        elif kind == 'satisfiable' and bits != 0:
+            return True
+    return count if kind == 'count' else kind == 'valid'
+
+#this function computes countModels, isValid or isSatisfiable (kind 'count', 'valid' or 'satisfiable') with a pool of worker 
+#processes; the chunks are split into several tasks per worker so that the work stays balanced, and as soon as one task settles
+#a validity or satisfiability question the pool is terminated, which stops the other workers at once
+def tableParallel(formula, kind, workers, chunkBits=16):
+    order = variablesOf(formula)
+    chunkBits = min(chunkBits, len(order))
+    total = 1 << (len(order) - chunkBits)
+    if total < 2 or tableProgram(formula, order) == None:
+        return {'count': countModels, 'valid': isValid, 'satisfiable': isSatisfiable}[kind](formula)
+    pieces = min(total, workers * 8)
+    tasks = [(kind, total * n // pieces, total * (n + 1) // pieces) for n in range(pieces)]
+    arena = FormulaArena()
+    root = arena.store(formula).index
+    with multiprocessing.Pool(workers, tableWorkerSetup, (arena, root, order, chunkBits)) as pool:
+        results = pool.imap_unordered(tableWorkerTask, tasks)
+        if kind == 'count':
+            return sum(results)
+        for result in results:
+            if result != (kind == 'valid'):
+                return result
+        return kind == 'valid'
+
 #this is a list of special characters used by the parser to parse an inputted string
 seps = ['(', ')', '~', '^', 'v', '>', '=', ':', 'T', 'F']
 
 import string
+import re
+import codecs
+import heapq
+import time
+
+#a token is either a single special character (in seps) or a maximal run of characters that are neither special characters nor 
+#spaces (a variable name); this pattern lets the tokenizer find every token in a single left-to-right pass over the input
+specials = re.escape(''.join(seps))
+tokenPattern = re.compile('[' + specials + ']|[^ ' + specials + ']+')
+bytesTokenPattern = re.compile(tokenPattern.pattern.encode('ascii'))
+
+#this function lazily yields the significant parts of a string one at a time; e.g. '(p ^ (q v r))' yields '(', 'p', '^', '(', 
+#'q', 'v', 'r', ')', ')'
+def tokenStream(inputString):
+    for match in tokenPattern.finditer(inputString):
+        yield match.group()
 
 #this function converts a string into a list of its significant parts; e.g. '(p ^ (q v r))' is converted into ['(', 'p', '^', 
 #'(', 'q', 'v', 'r', ')', ')']
 def tokenize(inputString):
-    result = []
-    state = 'open'
-    #this function loops over the input string, adding a character to the list if it's in seps (see above), ignoring it if 
-    #it's a space, and starting another loop otherwise (since it will then be a variable name, see below)
-    for n in range(len(inputString)):
-        if inputString[n] in seps:
-            result.append(inputString[n])
-            state = 'open'
-        elif inputString[n] == ' ':
-            state = 'open'
-        else:
-            #the character at index n must be the beginning of a variable name, and hence a new loop is constructed in order
-            #to find the end of the variable name and then add the whole variable name to the list; this is done by noting 
-            #that the end of a variable name will either be a space, a special character (in seps), or the end of the string
-            for m in range(n, len(inputString)):
-                if state == 'open' and (inputString[m] == ' ' or \
-                inputString[m] in seps):
-                    result.append(inputString[n:m])
-                    state = 'word'
-                elif state == 'open' and m+1 == len(inputString):
-                    result.append(inputString[n:m+1])
-                    state = 'word'
-    return result
+    return tokenPattern.findall(inputString)
+
+#this is the bulk version of tokenStream, which yields the tokens of a whole file without reading it into memory at once; the 
+#source may be a text or binary file object, or a buffer such as bytes or an mmap (which is scanned in place without copying)
+def tokenizeFile(source, chunkSize=1 << 20):
+    if not hasattr(source, 'read'):
+        for match in bytesTokenPattern.finditer(source):
+            yield match.group().decode('utf-8')
+        return
+    #a variable name may be split across two chunks, so a token touching the end of a chunk is carried over into the next one 
+    #unless it is a special character (which is always complete)
+    carry = ''
+    #a multi-byte character may also be split across two chunks of a binary file, so bytes are decoded incrementally
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        chunk = source.read(chunkSize)
+        if isinstance(chunk, bytes):
+            if not chunk:
+                decoder.decode(b'', True)
+                break
+            chunk = decoder.decode(chunk)
+            if not chunk:
+                continue
+        if not chunk:
+            break
+        text = carry + chunk
+        carry = ''
+        for match in tokenPattern.finditer(text):
+            if match.end() == len(text) and not match.group() in seps:
+                carry = match.group()
+            else:
+                yield match.group()
+    if carry:
+        yield carry
 
 #this function returns true if its input is 'T' or 'F'
 def valueTok(token):
@@ -142,411 +585,2995 @@ def variableTok(token):
             return False
     return True
 
-#this function parses a list of significant expressions recursively and returns the appropriate syntax tree (an instance of 
-#one of the classes above); the expected input is the output of the tokenize function (above) given a string as input
-def parse(tokens):
-    #this helper function takes an index and returns a tuple consisting of both the syntax tree beginning at that index 
-    #and the index after the tree; if the string at the input index is a '(', then it corresponds to the beginning of a syntax 
-    #tree for a binary connective or truth-value assignment, and hence the function is called recursively on the branches 
-    #corresponding to that connective or assignment (it will also be called recursively if the string is a '~')
-    def parseForm(index):
-        token = tokens[index]
-        if valueTok(token):
-            if token == 'T':
-                return (TruthValue(True), index + 1)
-            else:
-                return (TruthValue(False), index + 1)
+#this dictionary maps each binary connective (and the assignment symbol) to the class of its syntax tree
+binaryOps = {'^': And, 'v': Or, '>': Implies, '=': Bicond, ':': Assign}
+
+#this dictionary is what parseTokens builds formulas with by default: every node is made by its own class
+nodeBuilders = dict((cls, cls) for cls in [Variable, TruthValue, Not, And, Or, Implies, Bicond, Assign])
+
+#this exception is raised by parseTokens (below) for input that is not a well-formed formula; 'offset' is the position of the 
+#offending token in the token list (equal to the number of tokens if the formula ended too early)
+class ParseError(Exception):
+    def __init__(self, offset, message, line=None, column=None):
+        Exception.__init__(self, message)
+        self.offset = offset
+        #the position of the formula in a file (see readFormulas below), if it was read from one
+        self.line = line
+        self.column = column
+
+#this function parses a sequence of significant expressions and returns the appropriate syntax tree (an instance of one of the 
+#classes above); the expected input is the output of the tokenize function (above), or any other iterable of tokens such as 
+#tokenStream; rather than calling itself for every '~' and '(' it keeps an explicit stack of the connectives still waiting for 
+#their subformulas, so arbitrarily deep formulas are parsed in linear time without hitting Python's recursion limit; 'build' 
+#maps each formula class to the function which makes its nodes (by default the class itself), which lets FormulaArena (below) 
+#parse straight into its arrays
+def parseTokens(tokens, build=None):
+    if build == None:
+        build = nodeBuilders
+    tokens = iter(tokens)
+    offset = 0
+    #each stack entry is either '~' (a negation waiting for its subformula), '(' (a binary connective waiting for its left 
+    #branch) or a tuple (leftTree, op) (a binary connective waiting for its right branch)
+    stack = []
+    while True:
+        #first we read a single operand, pushing any negations and opening parentheses in front of it onto the stack
+        token = next(tokens, None)
+        if token == None:
+            raise ParseError(offset, 'unexpected end of formula')
+        offset += 1
+        if token == '~' or token == '(':
+            stack.append(token)
+            continue
+        elif valueTok(token):
+            tree = build[TruthValue](token == 'T')
         elif variableTok(token):
-            return (Variable(token), index + 1)
-        elif token == '~':
-            (tree, nextIndex) = parseForm(index + 1)
-            return (Not(tree), nextIndex)
-        else:
-            #here we take advantage of the fact that in this case the string at the input index will be a '(', and hence 
-            #the next index will correspond to the left branch of a binary connective or truth-value assignment
-            (leftTree, opIndex) = parseForm(index + 1)
-            op = tokens[opIndex]
-            (rightTree, parIndex) = parseForm(opIndex + 1)
-            if op == '^':
-                return (And(leftTree, rightTree), parIndex + 1)
-            elif op == 'v':
-                return (Or(leftTree, rightTree), parIndex + 1)
-            elif op == '>':
-                return (Implies(leftTree, rightTree), parIndex + 1)
-            elif op == '=':
-                return (Bicond(leftTree, rightTree), parIndex + 1)
-            elif op == ':':
-                return (Assign(leftTree, rightTree), parIndex + 1)
-    #we then call the helper function on the index 0 to construct the full syntax tree, which is then returned
+            tree = build[Variable](token)
+        else:
+            raise ParseError(offset - 1, "unexpected '%s'" % token)
+        #the operand then completes as many of the waiting connectives as it can; a '(' needs a connective to follow its left 
+        #branch and a finished right branch needs a ')'
+        while stack:
+            top = stack[-1]
+            if top == '~':
+                stack.pop()
+                tree = build[Not](tree)
+            elif top == '(':
+                op = next(tokens, None)
+                if not op in binaryOps:
+                    raise ParseError(offset, 'expected a connective')
+                offset += 1
+                stack[-1] = (tree, op)
+                break
+            else:
+                if next(tokens, None) != ')':
+                    raise ParseError(offset, "expected ')'")
+                offset += 1
+                stack.pop()
+                (leftTree, op) = top
+                tree = build[binaryOps[op]](leftTree, tree)
+        else:
+            if next(tokens, None) != None:
+                raise ParseError(offset, 'unexpected text after the end of the formula')
+            return tree
+
+#this function parses a list of significant expressions and returns the appropriate syntax tree, printing an error message 
+#(and returning None) if the expressions do not make up a well-formed formula
+def parse(tokens):
+    try:
+        return parseTokens(tokens)
+    #this checks for common user input mistakes and prints an error message pointing at the offending token
+    except ParseError as error:
+        print (errorMessage(error))
+
+#this function returns the error message for a formula that is not well-formed
+def errorMessage(error):
+    if error.line != None:
+        return "That is not a well-formed formula (%s at line %d, column %d)." % (error, error.line, error.column)
+    return "That is not a well-formed formula (%s at token %d)." % (error, error.offset)
+
+import collections
+
+#formulas typed into prover() and evaluator() (and the premises of proof scripts) are parsed through a cache, since the same 
+#premises come up again and again; this class keeps the most recently used formulas (at most 'size' of them), keyed by their 
+#tokens joined with single spaces so that differences in spacing do not matter, and counts its hits and misses; formulas are 
+#never modified, so a cached formula can safely be shared
+class ParseCache:
+    def __init__(self, size=4096):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    #this method returns the formula written in 'text', raising a ParseError if it is not well-formed
+    def parse(self, text):
+        tokens = tokenize(text)
+        key = ' '.join(tokens)
+        with self.lock:
+            formula = self.entries.get(key)
+            if formula != None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return formula
+            self.misses += 1
+        formula = parseTokens(tokens)
+        with self.lock:
+            self.entries[key] = formula
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return formula
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    #this method returns a dictionary of the numbers of hits, misses and cached formulas and the size limit
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries), 'size': self.size}
+
+parseCache = ParseCache()
+
+#this function parses a formula given as text through the cache, raising a ParseError if it is not well-formed
+def parseText(text):
+    return parseCache.parse(text)
+
+#this function parses a formula given as text through the cache, printing an error message (and returning None) if it is not 
+#well-formed, like parse
+def parseInput(text):
     try:
-        (parsedForm, nextIndex) = parseForm(0)
-        return parsedForm
-    #this checks for common user input mistakes and prints an error message
-    except (IndexError, TypeError):
-        print ("That is not a well-formed formula.")
+        return parseText(text)
+    except ParseError as error:
+        print (errorMessage(error))
+
+from array import array
+import functools
+
+#the classes below store formulas compactly in a FormulaArena: node i of an arena is described by ops[i] (the index of its class 
+#in arenaClasses), lefts[i] and rights[i]; for a negation lefts[i] is the index of its subformula, for a binary connective lefts[i]
+#and rights[i] are the indices of its branches, for a variable lefts[i] is the index of its name in the arena's name table and 
+#for a truth-value it is 1 (T) or 0 (F); a node is always added after its branches, so branches have smaller indices than 
+#their parents and a formula built in one go occupies a contiguous stretch of the arrays; this takes 9 bytes per node (plus 
+#the shared name table) instead of a full Python object per node, and nodes are not shared unless they are stored as such
+arenaClasses = [Variable, TruthValue, Not, And, Or, Implies, Bicond, Assign]
+arenaOps = dict((cls, op) for (op, cls) in enumerate(arenaClasses))
+(VARIABLE, TRUTHVALUE, NOT, AND, OR, IMPLIES, BICOND, ASSIGN) = range(len(arenaClasses))
+
+class FormulaArena:
+    def __init__(self):
+        self.ops = array('b')
+        self.lefts = array('i')
+        self.rights = array('i')
+        self.names = []
+        self.nameIds = {}
+
+    def __len__(self):
+        return len(self.ops)
+
+    #an arena is pickled as its three arrays (which pickle as raw bytes) and its name table, so that it is a compact way to send
+    #formulas to other processes
+    def __getstate__(self):
+        return (self.ops, self.lefts, self.rights, self.names)
+    def __setstate__(self, state):
+        (self.ops, self.lefts, self.rights, self.names) = state
+        self.nameIds = dict((name, n) for (n, name) in enumerate(self.names))
+
+    #this method adds a node and returns its index; the left branch of an assignment must be a variable, whose name evaluate
+    #looks up through it, and anything else raises a ValueError
+    def add(self, op, left, right=0):
+        if op == ASSIGN and self.ops[left] != VARIABLE:
+            raise ValueError('The left side of an assignment must be an atomic formula.')
+        self.ops.append(op)
+        self.lefts.append(left)
+        self.rights.append(right)
+        return len(self.ops) - 1
+
+    #this method returns the index of a variable name in the name table, adding it if necessary
+    def nameId(self, name):
+        n = self.nameIds.get(name)
+        if n == None:
+            n = self.nameIds[name] = len(self.names)
+            self.names.append(name)
+        return n
+
+    #this method adds a node given its class and fields in the same way as the class itself would be called (a name for a 
+    #variable, a truth-value, or the indices of the branches)
+    def build(self, cls, *fields):
+        if cls == Variable:
+            return self.add(VARIABLE, self.nameId(fields[0]))
+        elif cls == TruthValue:
+            return self.add(TRUTHVALUE, int(bool(fields[0])))
+        elif cls == Not:
+            return self.add(NOT, fields[0])
+        else:
+            return self.add(arenaOps[cls], fields[0], fields[1])
+
+    #this method parses a formula straight into the arena (without creating any formula objects) and returns a view of it
+    def parse(self, tokens):
+        build = dict((cls, functools.partial(self.build, cls)) for cls in arenaClasses)
+        return ArenaNode(self, parseTokens(tokens, build))
+
+    #this method copies a formula (made of the classes above) into the arena and returns a view of it; subformulas which are 
+    #shared within the formula are stored once, and passing the same 'indices' dictionary (from formulas to their indices) to 
+    #several calls shares them between formulas as well; alternatively 'keys' may be a dictionary from the fields of the nodes 
+    #stored so far, as (op, left, right) tuples of integers, to their indices, which shares nodes between calls in the same way 
+    #without keeping the formulas themselves alive (so that formulas can be stored one at a time as they are read)
+    def store(self, formula, indices=None, keys=None):
+        if indices == None:
+            indices = {}
+        stack = [(formula, False)]
+        while stack:
+            (node, ready) = stack.pop()
+            if node in indices:
+                continue
+            if type(node) == Not:
+                branches = [node.formula]
+            elif isinstance(node, BinaryOp):
+                branches = [node.left, node.right]
+            else:
+                branches = []
+            if not ready and branches:
+                stack.append((node, True))
+                for branch in reversed(branches):
+                    stack.append((branch, False))
+                continue
+            if type(node) == Variable:
+                fields = (VARIABLE, self.nameId(node.name), 0)
+            elif type(node) == TruthValue:
+                fields = (TRUTHVALUE, int(node.value), 0)
+            elif type(node) == Not:
+                fields = (NOT, indices[node.formula], 0)
+            else:
+                fields = (arenaOps[type(node)], indices[node.left], indices[node.right])
+            if keys == None:
+                indices[node] = self.add(*fields)
+            else:
+                n = keys.get(fields)
+                if n == None:
+                    n = keys[fields] = self.add(*fields)
+                indices[node] = n
+        return ArenaNode(self, indices[formula])
+
+    #this method rebuilds the ordinary (hash-consed) formula stored at index i; 'formulas' may be a dictionary from indices to 
+    #the formulas already rebuilt, which is then extended
+    def toFormula(self, i, formulas=None):
+        ops = self.ops
+        lefts = self.lefts
+        rights = self.rights
+        if formulas == None:
+            formulas = {}
+        stack = [(i, False)]
+        while stack:
+            (n, ready) = stack.pop()
+            if n in formulas:
+                continue
+            op = ops[n]
+            if op == VARIABLE:
+                formulas[n] = Variable(self.names[lefts[n]])
+            elif op == TRUTHVALUE:
+                formulas[n] = TruthValue(lefts[n])
+            elif not ready:
+                stack.append((n, True))
+                stack.append((lefts[n], False))
+                if op != NOT:
+                    stack.append((rights[n], False))
+            elif op == NOT:
+                formulas[n] = Not(formulas[lefts[n]])
+            else:
+                formulas[n] = arenaClasses[op](formulas[lefts[n]], formulas[rights[n]])
+        return formulas[i]
+
+    #this method evaluates the formula stored at index i exactly as its eval method would (in the same order, skipping the 
+    #same branches and printing the same message for unassigned variables), but with an explicit stack instead of recursion;
+    #each stack entry is a node index together with the value of its left branch once that is known
+    def evaluate(self, i, env):
+        ops = self.ops
+        lefts = self.lefts
+        rights = self.rights
+        stack = [(i, None, False)]
+        value = None
+        while stack:
+            (n, left, ready) = stack.pop()
+            op = ops[n]
+            if op == VARIABLE:
+                name = self.names[lefts[n]]
+                if name in env:
+                    value = env[name]
+                else:
+                    print ("Atomic formula %s has not been assigned a truth-value." % name)
+                    value = None
+            elif op == TRUTHVALUE:
+                value = bool(lefts[n])
+            elif op == ASSIGN:
+                if not ready:
+                    stack.append((n, None, True))
+                    stack.append((rights[n], None, False))
+                    continue
+                env[self.names[lefts[lefts[n]]]] = value
+                value = None
+            elif not ready:
+                stack.append((n, None, True))
+                stack.append((lefts[n], None, False))
+            elif op == NOT:
+                value = None if value == None else not value
+            elif left == None and (op == BICOND or (op == AND and value) or (op == OR and not value) or (op == IMPLIES and value)):
+                #the right branch is needed: evaluate it and come back with the left value (wrapped, since it may be None)
+                stack.append((n, [value], True))
+                stack.append((rights[n], None, False))
+            elif left == None:
+                #the left branch decided the value on its own
+                value = (not value) if op == IMPLIES else value
+            elif op == BICOND:
+                value = (left[0] and value) or (not(left[0]) and not(value))
+            elif op == IMPLIES:
+                value = not(not(value))
+        return value
+
+    #this method returns the string of the formula stored at index i, in the same notation as the formula classes
+    def text(self, i):
+        ops = self.ops
+        lefts = self.lefts
+        rights = self.rights
+        pieces = []
+        stack = [i]
+        while stack:
+            item = stack.pop()
+            if type(item) == str:
+                pieces.append(item)
+                continue
+            op = ops[item]
+            if op == VARIABLE:
+                pieces.append(str(self.names[lefts[item]]))
+            elif op == TRUTHVALUE:
+                pieces.append('T' if lefts[item] else 'F')
+            elif op == NOT:
+                pieces.append('~')
+                stack.append(lefts[item])
+            else:
+                stack.extend([')', rights[item], ' ' + arenaClasses[op].opStr + ' ', lefts[item]])
+                pieces.append('(')
+        return ''.join(pieces)
+
+#this class is a lightweight view of one node of an arena, with the same interface as the formula classes (.left, .right, 
+#.formula, .name, .value, eval and str); its 'kind' is the formula class it stands for
+class ArenaNode:
+    __slots__ = ('arena', 'index')
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+    @property
+    def kind(self):
+        return arenaClasses[self.arena.ops[self.index]]
+    @property
+    def left(self):
+        return ArenaNode(self.arena, self.arena.lefts[self.index])
+    @property
+    def right(self):
+        return ArenaNode(self.arena, self.arena.rights[self.index])
+    formula = left
+    @property
+    def name(self):
+        return self.arena.names[self.arena.lefts[self.index]]
+    @property
+    def value(self):
+        return bool(self.arena.lefts[self.index])
+    @property
+    def opStr(self):
+        return self.kind.opStr
+    def eval(self, env):
+        return self.arena.evaluate(self.index, env)
+    def toFormula(self):
+        return self.arena.toFormula(self.index)
+    def __str__(self):
+        return self.arena.text(self.index)
+    __repr__ = __str__
+
+#this function computes the truth-value of a single node from the truth-values of its branches (and of a variable from the 
+#environment), in the same way as the eval methods above but without printing anything for unassigned variables
+def nodeValue(node, values, env):
+    if type(node) == Variable:
+        return env.get(node.name)
+    elif type(node) == TruthValue:
+        return node.value
+    elif type(node) == Not:
+        value = values[node.formula]
+        return None if value == None else not value
+    left = values[node.left]
+    right = values[node.right]
+    if type(node) == And:
+        return left and right
+    elif type(node) == Or:
+        return left or right
+    elif type(node) == Implies:
+        return not(left and not(right))
+    else:
+        return (left and right) or (not(left) and not(right))
+
+#this function returns the truth-value of a formula in the environment env, or None if the formula mentions an atomic formula
+#env does not assign or contains an assignment (which is not carried out); unlike eval it works with an explicit stack, so it 
+#handles formulas of any depth, and it prints nothing
+def formulaValue(formula, env):
+    values = {}
+    stack = [(formula, False)]
+    while stack:
+        (node, ready) = stack.pop()
+        if node in values:
+            continue
+        if type(node) == Assign:
+            return None
+        elif type(node) == Not:
+            branches = [node.formula]
+        elif isinstance(node, BinaryOp):
+            branches = [node.left, node.right]
+        else:
+            branches = []
+        if not ready and branches:
+            stack.append((node, True))
+            for branch in reversed(branches):
+                stack.append((branch, False))
+            continue
+        value = nodeValue(node, values, env)
+        if value == None:
+            return None
+        values[node] = value
+    return values[formula]
+
+#this class keeps the state of an evaluator session: the environment of truth-value assignments together with a set of watched 
+#formulas whose truth-values are kept up to date; the value of every watched subformula is cached, and each subformula knows the
+#watched subformulas directly containing it, so that an assignment only recomputes the subformulas on the paths from the 
+#assigned variable up to the watched formulas, stopping wherever a value turns out not to change
+class Session:
+    def __init__(self):
+        self.env = {}
+        self.watched = []
+        self.values = {}
+        self.parents = {}
+        #the height of a subformula is one more than the height of its highest branch, so recomputing in order of height always
+        #handles the branches of a subformula before the subformula itself
+        self.height = {}
+
+    #this method starts watching a formula and returns its current truth-value; a formula containing an assignment is rejected 
+    #before any of its subformulas are entered, so that the session is left exactly as it was
+    def watch(self, formula):
+        stack = [formula]
+        seen = set()
+        while stack:
+            node = stack.pop()
+            if node in self.values or node in seen:
+                continue
+            seen.add(node)
+            if type(node) == Assign:
+                print ('Assignments cannot be watched.')
+                return None
+            elif type(node) == Not:
+                stack.append(node.formula)
+            elif isinstance(node, BinaryOp):
+                stack.append(node.left)
+                stack.append(node.right)
+        stack = [(formula, False)]
+        while stack:
+            (node, ready) = stack.pop()
+            if node in self.values:
+                continue
+            if type(node) == Not:
+                branches = [node.formula]
+            elif isinstance(node, BinaryOp):
+                branches = [node.left, node.right]
+            else:
+                branches = []
+            if not ready and branches:
+                stack.append((node, True))
+                for branch in reversed(branches):
+                    stack.append((branch, False))
+                continue
+            self.height[node] = 1 + max([self.height[branch] for branch in branches] + [-1])
+            self.parents[node] = []
+            for branch in set(branches):
+                self.parents[branch].append(node)
+            self.values[node] = nodeValue(node, self.values, self.env)
+        if not formula in self.watched:
+            self.watched.append(formula)
+        return self.values[formula]
+
+    #this method assigns a truth-value to an atomic formula and returns the watched formulas whose truth-value changed
+    def assign(self, name, value):
+        self.env[name] = value
+        variable = Variable(name)
+        if not variable in self.values:
+            return []
+        queue = [(0, 0, variable)]
+        queued = set([variable])
+        changed = set()
+        count = 1
+        while queue:
+            (height, n, node) = heapq.heappop(queue)
+            value = nodeValue(node, self.values, self.env)
+            if value == self.values[node] and type(value) == type(self.values[node]):
+                continue
+            self.values[node] = value
+            changed.add(node)
+            for parent in self.parents[node]:
+                if not parent in queued:
+                    queued.add(parent)
+                    heapq.heappush(queue, (self.height[parent], count, parent))
+                    count += 1
+        return [formula for formula in self.watched if formula in changed]
 
 #this is one of the two main functions of the program, which requests a string from the user as input and either outputs the 
-#truth-value of the corresponding logical formula or commits a truth-value assignment to the environment
+#truth-value of the corresponding logical formula or commits a truth-value assignment to the environment; inputting 'watch X' 
+#also keeps formula X watched, printing its new truth-value whenever an assignment changes it
 def evaluator():
-    env = {}
+    session = Session()
     while True:
         e = input('%')
         if e == 'exit':
             break
         else:
-            #here we use our parser to determine the appropriate syntax tree and then run its eval method and print both the 
-            #result and the current environment of truth-value assignments
-            try:
-                print ('%', parse(tokenize(e)).eval(env))
-                print ('   env =', env)
-            #if the user inputted an improper string, they will get an error message and the program will continue to run
-            except AttributeError:
-                print ('   env =', env)
+            evaluatorStep(session, e)
+
+#this function handles a single input of evaluator() in the given session (an instance of Session), printing the result
+def evaluatorStep(session, e):
+    env = session.env
+    if e.startswith('watch '):
+        formula = parseInput(e[len('watch '):])
+        if formula != None:
+            print ('%', session.watch(formula))
+        print ('   env =', env)
+        return
+    #here we use our parser to determine the appropriate syntax tree and then evaluate it with formulaValue (which, unlike its 
+    #eval method, handles formulas of any depth) or, for assignments, update the session, and print both the result and the 
+    #current environment of truth-value assignments
+    formula = parseInput(e)
+    if formula == None:
+        pass
+    elif type(formula) == Assign and type(formula.left) != Variable:
+        print ('Only an atomic formula can be assigned a truth-value, e.g. (p : T) or (p : ~q).')
+    elif hasAssignment(formula.right if type(formula) == Assign else formula):
+        print ('Assignments cannot be part of a larger formula.')
+    elif type(formula) == Assign:
+        value = inputValue(formula.right, env)
+        if value != None:
+            changed = session.assign(formula.left.name, value)
+            print ('%', None)
+            for watched in changed:
+                print ('  ', watched, '=', session.values[watched])
+    else:
+        print ('%', inputValue(formula, env))
+    print ('   env =', env)
+
+#this function returns the truth-value of a formula (which contains no assignment) in env, or None after printing an error 
+#message for each atomic formula in it which env does not assign
+def inputValue(formula, env):
+    value = formulaValue(formula, env)
+    if value == None:
+        for name in variablesOf(formula):
+            if not name in env:
+                print ("Atomic formula %s has not been assigned a truth-value." % name)
+    return value
+
+#this function splits a string at each of the given separator characters in a single pass and returns a list of pairs (offset,
+#part), where offset is the position of the part in the string; an empty part after a final separator is left out
+def splitList(string, separators=',:'):
+    result = []
+    start = 0
+    for match in re.finditer('[' + re.escape(separators) + ']', string):
+        result.append((start, string[start:match.start()]))
+        start = match.end()
+    if start < len(string):
+        result.append((start, string[start:]))
+    return result
 
 #this function is similar to tokenize above, except it constructs a list of whole formula-expressions or special expressions
 #separated by ',' or ':'
 def listMaker(string):
-    result = []
-    state = 'open'
-    for n in range(len(string)):
-        #the end of a token string will either be a ',' or a ':' or the end of the full input string, and we take advantage 
-        #of this to add the full token string to the constructed list
-        for m in range(n, len(string)):
-            if state == 'open' and (string[m] == ',' or string[m] == ':'):
-                result.append(string[n:m])
-                state = 'formula'
-            elif state == 'open' and m+1 == len(string):
-                result.append(string[n:m+1])
-                state = 'formula'
-        if string[n] == ',' or string[n] == ':':
-            state = 'open'
-    return result
+    return [part for (offset, part) in splitList(string)]
+
+#this class stores a proof; the proof is a list of top-level lines, each of which is a derived formula, an assumption (which 
+#includes the premises) or a closed subproof, numbered from 0 as in the README; the lines are kept in an append-only list 
+#together with a stack of the positions of the open assumptions (innermost last), so looking up a line, checking which 
+#subproof is open, adding a line and undoing the last one all take constant time, and closing a subproof only moves the lines
+#of that subproof (each line is moved once when its subproof is closed, so this is constant time per line overall)
+class Proof:
+    def __init__(self):
+        #each line is a pair (kind, content): ('line', formula), ('assumption', formula) or ('subproof', lines)
+        self.lines = []
+        self.open = []
+        #the printed form of each line, computed when it is first printed and then kept (None until then); the entry of a 
+        #closed subproof is the list of the entries of its lines
+        self.texts = []
+        #the number of formulas in the proof, counting those inside closed subproofs
+        self.size = 0
+
+    def __len__(self):
+        return len(self.lines)
+
+    #proofs are printed as nested lists in which assumptions are single-element lists, e.g. [[(p > q)], [p], q]
+    def __str__(self):
+        return renderLines(self.lines, self.texts)
+    def __repr__(self):
+        return str(self)
+
+    def derive(self, formula):
+        self.lines.append(('line', formula))
+        self.texts.append(None)
+        self.size += 1
+
+    def assume(self, formula):
+        self.open.append(len(self.lines))
+        self.lines.append(('assumption', formula))
+        self.texts.append(None)
+        self.size += 1
+
+    #this method adds a closed subproof (a list of lines) at the end of the proof
+    def addSubproof(self, lines):
+        self.lines.append(('subproof', lines))
+        self.texts.append(None)
+        self.size += formulaCount(lines)
+
+    #this method returns the formula at position n (None for a closed subproof), raising an IndexError if there is no such line
+    def formula(self, n):
+        if n < 0:
+            raise IndexError(n)
+        (kind, content) = self.lines[n]
+        if kind == 'subproof':
+            return None
+        return content
+
+    def isAssumption(self, n):
+        return self.lines[n][0] == 'assumption'
+
+    #this method returns the position of the innermost open assumption, or None if no assumption is open
+    def innermost(self):
+        if self.open:
+            return self.open[-1]
+        return None
+
+    #this method closes the subproof beginning with the innermost open assumption at position n and ending at position m: lines n 
+    #to m become a single closed subproof at position n, and any lines after m are dropped
+    def close(self, n, m):
+        subproof = self.lines[n:m + 1]
+        texts = self.texts[n:m + 1]
+        self.size -= formulaCount(self.lines[m + 1:])
+        del self.lines[n:]
+        del self.texts[n:]
+        self.open.pop()
+        self.lines.append(('subproof', subproof))
+        self.texts.append(texts)
+
+    #this method removes the last line of the proof, if there is one
+    def undo(self):
+        if self.lines:
+            (kind, content) = self.lines.pop()
+            self.texts.pop()
+            self.size -= formulaCount([(kind, content)])
+            if kind == 'assumption':
+                self.open.pop()
+
+    #this method returns the printed form of line n
+    def text(self, n):
+        return renderLines(self.lines, self.texts, n)
+
+#this function returns the number of formulas in a list of proof lines, counting those inside closed subproofs; lines are only
+#counted when they are added to or removed from a proof, so keeping Proof.size up to date takes constant time per line overall
+def formulaCount(lines):
+    count = 0
+    stack = [lines]
+    while stack:
+        for (kind, content) in stack.pop():
+            if kind == 'subproof':
+                stack.append(content)
+            else:
+                count += 1
+    return count
+
+#this function returns the printed form of a derived line or an assumption
+def lineText(line):
+    (kind, content) = line
+    if kind == 'line':
+        return formulaText(content)
+    else:
+        return '[' + formulaText(content) + ']'
+
+#this function returns the printed form of a list of proof lines (or of just its n-th line if n is given), where 'texts' holds 
+#the printed forms already known as in Proof.texts, and is filled in as lines are printed; closed subproofs are expanded with an 
+#explicit stack, since they may be nested arbitrarily deeply
+def renderLines(lines, texts, n=None):
+    parts = []
+    if n == None:
+        stack = [(lines, texts, 0, 0, len(lines))]
+    else:
+        stack = [(lines, texts, n, n, n + 1)]
+    while stack:
+        (lines, texts, start, i, end) = stack.pop()
+        if i == start and (n == None or stack):
+            parts.append('[')
+        if i == end:
+            if n == None or stack:
+                parts.append(']')
+            continue
+        if i > start:
+            parts.append(', ')
+        stack.append((lines, texts, start, i + 1, end))
+        (kind, content) = lines[i]
+        if kind == 'subproof':
+            if texts[i] == None:
+                texts[i] = [None] * len(content)
+            stack.append((content, texts[i], 0, 0, len(content)))
+        else:
+            if texts[i] == None:
+                texts[i] = lineText(lines[i])
+            parts.append(texts[i])
+    return ''.join(parts)
+
+#this dictionary gives the number of proof lines (or, for 'Assume', formulas) each inference rule refers to
+ruleArity = {'^E1': 1, '^E2': 1, '^I': 2, 'Assume': 1, 'TI': 0, 'FE': 1, 'FI': 2, 'R': 1, 'vE': 3, 'vI1': 1, 'vI2': 1,
+             '~E': 1, '~I': 2, '>E': 2, '>I': 2, '=E1': 2, '=E2': 2, '=I': 2, 'delete': 0}
+
+#this function applies a single inference rule (as separated by listMaker, e.g. ['^E1', ' 0']) to a proof (an instance of 
+#Proof) and returns a pair consisting of the proof and an error message, which is None if the rule was applied successfully 
+#(otherwise the proof is left unchanged); 'ask' is a function returning the extra formula needed by the rules 'FE', 'vI1' and 
+#'vI2'
+def applyRule(proof, rule, ask):
+    #there are 18 separate inference rules that can be applied, each of which must be handled separately (see README for 
+    #details on the separate inference rules; I am only including comments on the first rule and a couple others since the rest
+    #are all handled in a similar way); I assume the reader has a basic understanding of natural deduction systems in 
+    #sentential/propositional logic
+    #these first few conditions check for a couple simple user mistakes and then assign the line numbers the rule refers to and
+    #the formulas on those lines to variables n1, pr1, etc. to make the rest of the code cleaner
+    if len(rule) == 0 or not rule[0] in ruleArity:
+        return (proof, 'That is not an acceptable inference rule.')
+    elif rule[0] == 'Assume' and not len(rule) == 2:
+        return (proof, 'You can only assume a single formula.')
+    elif not len(rule) == ruleArity[rule[0]] + 1:
+        return (proof, 'That is not an acceptable inference rule.')
+    numbers = []
+    formulas = []
+    if not rule[0] == 'Assume':
+        try:
+            numbers = [int(n) for n in rule[1:]]
+            formulas = [proof.formula(n) for n in numbers]
+        except (IndexError, ValueError):
+            return (proof, 'That line is not in the proof.')
+        if None in formulas:
+            return (proof, 'That line is a closed subproof.')
+    (n1, n2, n3) = (numbers + [None, None, None])[:3]
+    (pr1, pr2, pr3) = (formulas + [None, None, None])[:3]
+    #formulas provided by the user are parsed below, and if they are not well-formed the proof is left unchanged
+    try:
+        if rule[0] == '^E1':
+            #as an example, if the inputted inference rule is conjunction elimination on the left conjunct, we first check that
+            #the formula the user specified is in fact a conjunction, and then add its left conjunct to the proof
+            if type(pr1) == And:
+                proof.derive(pr1.left)
+            else:
+                return (proof, 'That formula is not a conjunction.')
+        elif rule[0] == '^E2':
+            if type(pr1) == And:
+                proof.derive(pr1.right)
+            else:
+                return (proof, 'That formula is not a conjunction.')
+        elif rule[0] == '^I':
+            proof.derive(And(pr1, pr2))
+        elif rule[0] == '~E':
+            if type(pr1) == Not and type(pr1.formula) == Not:
+                proof.derive(pr1.formula.formula)
+            else:
+                return (proof, 'That is not a double negation.')
+        elif rule[0] == '>E':
+            if type(pr2) == Implies and pr1 is pr2.left:
+                proof.derive(pr2.right)
+            else:
+                return (proof, 'That is not an acceptable use of >E.')
+        elif rule[0] == '=E1':
+            if type(pr2) == Bicond and pr1 is pr2.left:
+                proof.derive(pr2.right)
+            else:
+                return (proof, 'That is not an acceptable use of =E1.')
+        elif rule[0] == '=E2':
+            if type(pr2) == Bicond and pr1 is pr2.right:
+                proof.derive(pr2.left)
+            else:
+                return (proof, 'That is not an acceptable use of =E2.')
+        elif rule[0] == 'Assume':
+            #here we begin a subproof with an assumption specified by the user (see README for details)
+            proof.assume(parseText(rule[1]))
+        elif rule[0] == 'FI':
+            if type(pr2) == Not and pr2.formula is pr1:
+                proof.derive(TruthValue(False))
+            else:
+                return (proof, 'That is not a contradiction.')
+        elif rule[0] == 'FE':
+            #here we ask the user to provide a formula, which will be added to the proof as a consequence of the contradiction 
+            #specified by the user
+            if pr1 is TruthValue(False):
+                proof.derive(parseText(ask()))
+            else:
+                return (proof, 'That is not a contradiction.')
+        elif rule[0] == '~I':
+            #here we must first make sure the specified assumption begins the innermost open subproof, i.e. that any 
+            #subproofs within it have already been closed (see README for details)
+            if proof.isAssumption(n1) and not proof.innermost() == n1:
+                return (proof, 'You must first close the current subproof.')
+            #the contradiction must lie within the subproof (the baseline accepted an earlier line, and then closed an empty 
+            #subproof and lost the assumption and every line after it)
+            if proof.innermost() == n1 and n1 <= n2 and pr2 is TruthValue(False) and not proof.isAssumption(n2):
+                proof.close(n1, n2)
+                proof.derive(Not(pr1))
+            else:
+                return (proof, 'That is not an acceptable use of ~I.')
+        elif rule[0] == 'R':
+            proof.derive(pr1)
+        elif rule[0] == '>I':
+            #just as with rule '~I' above, we must first check for subproofs which have not been closed
+            if proof.isAssumption(n1) and not proof.innermost() == n1:
+                return (proof, 'You must first close the current subproof.')
+            #the consequent may be any line still available, including one before the assumption: from [p], [q] follows (q > p)
+            if proof.innermost() == n1:
+                proof.close(n1, len(proof) - 1)
+                proof.derive(Implies(pr1, pr2))
+            else:
+                return (proof, 'That is not an acceptable use of >I.')
+        elif rule[0] == 'TI':
+            proof.derive(TruthValue(True))
+        elif rule[0] == '=I':
+            if type(pr1) == Implies and type(pr2) == Implies and pr1.left is pr2.right and pr1.right is pr2.left:
+                proof.derive(Bicond(pr1.left, pr1.right))
+            else:
+                return (proof, 'That is not an acceptable use of =I.')
+        elif rule[0] == 'vI1':
+            proof.derive(Or(pr1, parseText(ask())))
+        elif rule[0] == 'vI2':
+            proof.derive(Or(parseText(ask()), pr1))
+        elif rule[0] == 'vE':
+            if proof.isAssumption(n2) or proof.isAssumption(n3):
+                return (proof, 'Conditionals cannot be assumptions. Use rule R to discharge assumptions.')
+            elif type(pr1) == Or and type(pr2) == Implies and type(pr3) == Implies and pr1.left is pr2.left and \
+                 pr1.right is pr3.left and pr2.right is pr3.right:
+                proof.derive(pr2.right)
+            else:
+                return (proof, 'That is not an acceptable use of vE.')
+        elif rule[0] == 'delete':
+            #removes the last line of the proof
+            proof.undo()
+    except ParseError as error:
+        return (proof, errorMessage(error))
+    return (proof, None)
 
 #this is the second main function of our program, which allows the user to construct a proof in a sound and complete 
 #derivation system for sentential logic
 def prover():
-    #the proof will be treated as a list of formulas and further lists (which correspond to assumptions and subproofs)
-    proof = []
+    #the proof is kept by a ProverSession (below)
+    session = ProverSession()
     e = input('Please state the premises: ')
     if e == 'exit':
         return None
     else:
-        #the premises are separated by commas, and hence listMaker can separate them before we feed them into our parser and
-        #construct the initial proof, which is then printed (see README for details)
-        prems = listMaker(e)
-        for pr in prems:
-            #this if condition catches user input errors and reruns prover (parse will print an error message)
-            if parse(tokenize(pr)) == None:
-                prover()
-                return None
-            else:
-                proof.append([parse(tokenize(pr))])
-        print ('  proof =', proof)
+        #this if condition catches user input errors and reruns prover (an error message will have been printed)
+        if not session.start(e):
+            prover()
+            return None
         while True:
             e = input('Please apply an inference rule: ')
             if e == 'exit':
                 break
+            elif e == 'show':
+                session.show()
+            else:
+                session.apply(listMaker(e), lambda: input('Please provide a formula: '))
+
+#this class holds the proof (an instance of Proof) of a prover session; rather than reprinting the whole proof after every rule, 
+#which would make each step of a long session cost more than the last, it prints only what the rule changed: the new line, 
+#or which lines were deleted or closed into a subproof (the whole proof can still be printed with show())
+class ProverSession:
+    def __init__(self):
+        self.proof = None
+
+    #this method starts the proof with the premises given in e (separated by commas, so listMaker can separate them before we
+    #feed them into our parser); it returns False, after printing an error message, if a premise is not well-formed
+    def start(self, e):
+        proof = Proof()
+        for pr in listMaker(e):
+            premise = parseInput(pr)
+            if premise == None:
+                return False
+            proof.assume(premise)
+        self.proof = proof
+        self.show()
+        return True
+
+    #this method prints every line of the proof with its number, closed subproofs printed as nested lists
+    def show(self):
+        if len(self.proof) == 0:
+            print ('  the proof is empty')
+        for n in range(len(self.proof)):
+            self.printLine(n)
+
+    def printLine(self, n):
+        print ('  %d  %s' % (n, self.proof.text(n)))
+
+    #this method applies a rule (as separated by listMaker) with applyRule (above) and prints either the change to the proof or an
+    #error message, which it also returns (None if the rule was applied)
+    def apply(self, rule, ask):
+        before = len(self.proof)
+        (self.proof, error) = applyRule(self.proof, rule, ask)
+        if error != None:
+            print (error)
+        elif rule[0] == 'delete':
+            if before > 0:
+                print ('  line %d deleted' % (before - 1))
+        elif rule[0] in ('~I', '>I'):
+            #lines n to m were closed into a subproof at line n (lines after m were dropped), and the conclusion is line n + 1
+            n = len(self.proof) - 2
+            m = n + len(self.proof.lines[n][1]) - 1
+            if m + 1 == before - 1:
+                print ('  line %d deleted' % (m + 1))
+            elif m + 1 < before - 1:
+                print ('  lines %d-%d deleted' % (m + 1, before - 1))
+            print ('  lines %d-%d closed into a subproof at line %d' % (n, m, n))
+            self.printLine(n + 1)
+        else:
+            self.printLine(len(self.proof) - 1)
+        return error
+
+#the functions below check proofs written in a proof script instead of typed in through prover(); the first line of a script 
+#states the premises (separated by commas, as in prover) and every following line applies one inference rule, written as in 
+#prover, except that the formula asked for by 'FE', 'vI1' and 'vI2' is given inline after a ':', e.g. 'vI1, 0: q'; blank lines 
+#and lines starting with '#' are ignored
+
+#this function separates a line of a proof script into the rule (as separated by listMaker) and its inline formula (or None)
+def scriptRule(line):
+    rule = listMaker(line)
+    if len(rule) == 3 and rule[0] in ('FE', 'vI1', 'vI2'):
+        return (rule[:2], rule[2])
+    else:
+        return (rule, None)
+
+#this function checks a proof script (a string or any iterable of lines) with the same inference rules as prover() and returns a
+#triple (valid, message, proof), where message points at the first line which could not be applied (or is None)
+def checkProof(script):
+    if isinstance(script, str):
+        script = script.splitlines()
+    proof = None
+    for (number, line) in enumerate(script, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if proof == None:
+            proof = Proof()
+            if line.startswith('Premises:'):
+                line = line[len('Premises:'):]
+            for pr in listMaker(line):
+                try:
+                    proof.assume(parseText(pr))
+                except ParseError as error:
+                    return (False, 'line %d: %s' % (number, errorMessage(error)), proof)
+            continue
+        (rule, formula) = scriptRule(line)
+        (proof, error) = applyRule(proof, rule, lambda: formula or '')
+        if error != None:
+            return (False, 'line %d: %s' % (number, error), proof)
+    if proof == None:
+        return (False, 'The script does not state the premises.', Proof())
+    return (True, None, proof)
+
+#this function checks the proof script stored at 'path' and returns (path, valid, message, seconds taken)
+def checkFile(path):
+    start = time.perf_counter()
+    try:
+        with open(path, encoding='utf-8') as f:
+            (valid, message, proof) = checkProof(f)
+    except (OSError, UnicodeDecodeError) as error:
+        (valid, message) = (False, str(error))
+    return (path, valid, message, time.perf_counter() - start)
+
+#this function checks many proof script files, using a pool of worker processes if workers > 1, and yields the result of 
+#checkFile for each of them in order
+def checkFiles(paths, workers=1):
+    if workers <= 1:
+        for path in paths:
+            yield checkFile(path)
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for result in pool.imap(checkFile, paths, chunksize=16):
+                yield result
+
+#the functions below save formulas and proofs in a binary archive and open such archives again without parsing anything; all 
+#numbers are little-endian and every section starts at a multiple of 8 bytes:
+#   header      'SLAR', the format version, then the counts and offsets of the sections below (see archiveHeader)
+#   nodes       three columns as in a FormulaArena: the opcodes (1 byte per node), the left fields and the right fields (4 bytes
+#               each); nodes are in postorder, so a branch is the index of an earlier node, and a subformula occurring several
+#               times (in one formula or in several) is stored once and referred back to
+#   names       the offsets of the variable names (8 bytes each, one more than there are names) into the UTF-8 text following them
+#   roots       the node indices of the saved formulas (4 bytes each)
+#   proofs      for each proof the offsets of its kinds and nodes columns and its number of entries (8 bytes each), followed by 
+#               those columns: each entry is a kind (1 byte: a derived line, an assumption, or the opening or closing of a closed 
+#               subproof) and a node index (4 bytes, 0 for openings and closings)
+#openArchive maps the file into memory and reads the columns in place, so opening an archive of any size reads only the header,
+#and formulas are only built from the nodes that are actually used
+
+import mmap
+import struct
+
+archiveMagic = b'SLAR'
+archiveVersion = 1
+archiveHeader = struct.Struct('<4sII10Q')
+(LINE, ASSUMPTION, OPEN, CLOSE) = range(4)
+
+#this function writes bytes at the next multiple of 8 in the file and returns the offset they were written at
+def writeSection(f, data):
+    offset = f.tell()
+    if offset % 8:
+        f.write(b'\0' * (8 - offset % 8))
+        offset += 8 - offset % 8
+    f.write(data)
+    return offset
+
+#this function returns the little-endian bytes of an array
+def littleEndian(column):
+    if sys.byteorder == 'little':
+        return column.tobytes()
+    column = array(column.typecode, column)
+    column.byteswap()
+    return column.tobytes()
+
+#this function saves formulas (an iterable of formulas) and proofs (an iterable of Proof instances) to an archive at 'path'
+def saveArchive(path, formulas=(), proofs=()):
+    arena = FormulaArena()
+    #nodes are shared between formulas by their fields rather than by the formulas themselves, so that each formula can be freed
+    #once it has been stored (formulas may come from a generator such as readFormulas)
+    keys = {}
+    roots = array('I', [arena.store(formula, keys=keys).index for formula in formulas])
+    #each proof becomes a kinds column and a nodes column, written out with an explicit stack of the subproofs being visited
+    entries = []
+    for proof in proofs:
+        kinds = array('B')
+        nodes = array('I')
+        stack = [iter(proof.lines)]
+        while stack:
+            line = next(stack[-1], None)
+            if line == None:
+                stack.pop()
+                if stack:
+                    kinds.append(CLOSE)
+                    nodes.append(0)
+            elif line[0] == 'subproof':
+                kinds.append(OPEN)
+                nodes.append(0)
+                stack.append(iter(line[1]))
             else:
-                #there are 18 separate inference rules that can be applied, each of which must be handled separately (see 
-                #README for details on the separate inference rules; I am only including comments on the first rule and a
-                #couple others since the rest are all handled in a similar way); I assume the reader has a basic
-                #understanding of natural deduction systems in sentential/propositional logic
-                rule = listMaker(e)
-                #these first few conditions simply assign values to variables pr1, etc. to make the rest of the code cleaner 
-                #and check for a couple simple user mistakes
-                if len(rule) == 2 and not rule[0] == 'Assume':
-                    pr1 = proof[int(rule[1])]
-                elif len(rule) == 3 and not rule[0] == 'Assume':                   
-                    pr1 = proof[int(rule[1])]
-                    pr2 = proof[int(rule[2])]
-                elif rule[0] == 'Assume' and not len(rule) == 2:
-                    print ('You can only assume a single formula.')
-                elif rule[0] == 'Assume' and len(rule) == 2:
-                    pass
-                elif rule[0] == 'TI' or rule[0] == 'delete':
-                    pass
-                elif rule[0] == 'vE' and len(rule) == 4:
-                    pr1 = proof[int(rule[1])]
-                    pr2 = proof[int(rule[2])]
-                    pr3 = proof[int(rule[3])]
+                kinds.append(LINE if line[0] == 'line' else ASSUMPTION)
+                nodes.append(arena.store(line[1], keys=keys).index)
+        entries.append((kinds, nodes))
+    names = [name.encode('utf-8') for name in arena.names]
+    nameOffsets = array('Q', [0])
+    for name in names:
+        nameOffsets.append(nameOffsets[-1] + len(name))
+    with open(path, 'wb') as f:
+        f.write(b'\0' * archiveHeader.size)
+        opsOffset = writeSection(f, arena.ops.tobytes())
+        leftsOffset = writeSection(f, littleEndian(arena.lefts))
+        rightsOffset = writeSection(f, littleEndian(arena.rights))
+        nameOffset = writeSection(f, littleEndian(nameOffsets) + b''.join(names))
+        rootOffset = writeSection(f, littleEndian(roots))
+        table = array('Q')
+        proofOffset = writeSection(f, b'\0' * (24 * len(entries)))
+        for (kinds, nodes) in entries:
+            table.extend([writeSection(f, kinds.tobytes()), writeSection(f, littleEndian(nodes)), len(kinds)])
+        f.seek(proofOffset)
+        f.write(littleEndian(table))
+        f.seek(0)
+        f.write(archiveHeader.pack(archiveMagic, archiveVersion, 0, len(arena), opsOffset, leftsOffset, rightsOffset,
+                                   len(names), nameOffset, len(roots), rootOffset, len(entries), proofOffset))
+
+#this function returns a read-only view of 'count' numbers of the given type (an array typecode) starting at 'offset' in a 
+#buffer, without copying them (except on big-endian machines, which get a byte-swapped copy)
+def bufferColumn(buffer, offset, count, typecode):
+    size = array(typecode).itemsize
+    view = memoryview(buffer)[offset:offset + count * size]
+    if size == 1 or sys.byteorder == 'little':
+        return view.cast(typecode)
+    column = array(typecode, view.tobytes())
+    column.byteswap()
+    return column
+
+#this class is the name table of an archive; names are decoded when first used
+class ArchiveNames:
+    def __init__(self, buffer, offset, count):
+        self.offsets = bufferColumn(buffer, offset, count + 1, 'Q')
+        self.text = memoryview(buffer)[offset + 8 * (count + 1):]
+        self.decoded = {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, n):
+        name = self.decoded.get(n)
+        if name == None:
+            if not 0 <= n < len(self):
+                raise IndexError(n)
+            name = self.decoded[n] = str(self.text[self.offsets[n]:self.offsets[n + 1]], 'utf-8')
+        return name
+
+#this class is an archive opened by openArchive; it works like a read-only FormulaArena whose columns are the memory-mapped 
+#file, so ArenaNode views of its nodes can be evaluated and printed straight from the file; formulas rebuilt from it are 
+#remembered, so each node is rebuilt at most once
+class FormulaArchive(FormulaArena):
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < archiveHeader.size:
+            raise ValueError('%s is not a formula archive' % path)
+        (magic, version, flags, count, opsOffset, leftsOffset, rightsOffset, nameCount, nameOffset, rootCount, rootOffset,
+         proofCount, proofOffset) = archiveHeader.unpack_from(self.map)
+        if magic != archiveMagic:
+            raise ValueError('%s is not a formula archive' % path)
+        if version != archiveVersion:
+            raise ValueError('%s has unsupported archive version %d' % (path, version))
+        self.ops = bufferColumn(self.map, opsOffset, count, 'B')
+        self.lefts = bufferColumn(self.map, leftsOffset, count, 'I')
+        self.rights = bufferColumn(self.map, rightsOffset, count, 'I')
+        self.names = ArchiveNames(self.map, nameOffset, nameCount)
+        self.roots = bufferColumn(self.map, rootOffset, rootCount, 'I')
+        self.proofTable = bufferColumn(self.map, proofOffset, 3 * proofCount, 'Q')
+        self.formulas = {}
+
+    def add(self, op, left, right=0):
+        raise TypeError('archives are read-only')
+
+    def toFormula(self, i, formulas=None):
+        return FormulaArena.toFormula(self, i, self.formulas if formulas == None else formulas)
+
+    #this method returns a view of the n-th saved formula
+    def formula(self, n):
+        return ArenaNode(self, self.roots[n])
+
+    def proofCount(self):
+        return len(self.proofTable) // 3
+
+    #this method rebuilds the n-th saved proof as a Proof
+    def proof(self, n):
+        (kindsOffset, nodesOffset, count) = self.proofTable[3 * n:3 * n + 3]
+        kinds = bufferColumn(self.map, kindsOffset, count, 'B')
+        nodes = bufferColumn(self.map, nodesOffset, count, 'I')
+        proof = Proof()
+        #'stack' holds the line lists of the closed subproofs being rebuilt; the top-level lines go through the Proof methods so
+        #that its open assumptions are recorded
+        stack = []
+        for (kind, node) in zip(kinds, nodes):
+            if kind == OPEN:
+                stack.append([])
+            elif kind == CLOSE:
+                lines = stack.pop()
+                if stack:
+                    stack[-1].append(('subproof', lines))
                 else:
-                    print ('That is not an acceptable inference rule.')
-                if rule[0] == '^E1':
-                    #as an example, if the inputted inference rule is conjunction elimination on the left conjunct, we first 
-                    #check that the formula the user specified is in fact a conjunction, and then add its left conjunct to 
-                    #the proof (which is then printed)
-                    if type(pr1) == And:
-                        proof.append(pr1.left)
-                    #here (and for each inference rule) we must check whether the formula the user specified is an assumption, 
-                    #since in that case it will be contained within a single-element list and must be treated accordingly
-                    elif type(pr1) == list and len(pr1) == 1 and \
-                         type(pr1[0]) == And:
-                        proof.append(pr1[0].left)
-                    else:
-                        print ('That formula is not a conjunction.')
-                    print ('  proof =', proof)
-                elif rule[0] == '^E2':
-                    if type(pr1) == And:
-                        proof.append(pr1.right)
-                    elif type(pr1) == list and len(pr1) == 1 and \
-                         type(pr1[0]) == And:
-                        proof.append(pr1[0].right)
-                    else:
-                        print ('That formula is not a conjunction.')
-                    print ('  proof =', proof)
-                elif rule[0] == '^I':
-                    if type(pr1) == list and len(pr1) == 1 and not type(pr2) \
-                       == list:
-                        proof.append(And(pr1[0], pr2))
-                        print ('  proof =', proof)
-                    elif (not type(pr1) == list) and type(pr2) == list and \
-                         len(pr2) == 1:
-                        proof.append(And(pr1, pr2[0]))
-                        print ('  proof =', proof)
-                    elif type(pr1) == list and type(pr2) == list and len(pr1) \
-                         == 1 and len(pr2) == 1:
-                        proof.append(And(pr1[0], pr2[0]))
-                        print ('  proof =', proof)
-                    else:
-                        proof.append(And(pr1, pr2))
-                        print ('  proof =', proof)
-                elif rule[0] == '~E':
-                    if type(pr1) == Not and type(pr1.formula) == Not:
-                        proof.append(pr1.formula.formula)
-                        print ('  proof =', proof)
-                    elif type(pr1) == list and len(pr1) == 1 and type(pr1[0]) \
-                         == Not and type(pr1[0].formula) == Not:
-                        proof.append(pr1[0].formula.formula)
-                        print ('  proof =', proof)
-                    else:
-                        print ('That is not a double negation.')
-                elif rule[0] == '>E':
-                    if type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                       Implies and str(pr1[0]) == str(pr2.left):
-                        proof.append(pr2.right)
-                        print ('  proof =', proof)
-                    elif (not type(pr1) == list) and type(pr2) == list and \
-                         len(pr2) == 1 and type(pr2[0]) == Implies and \
-                         str(pr1) == str(pr2[0].left):
-                        proof.append(pr2[0].right)
-                        print ('  proof =', proof)
-                    elif type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                         list and len(pr2) == 1 and type(pr2[0]) == Implies \
-                         and str(pr1[0]) == str(pr2[0].left):
-                        proof.append(pr2[0].right)
-                        print('  proof =', proof)
-                    elif (not type(pr1) == list) and type(pr2) == Implies \
-                         and str(pr1) == str(pr2.left):
-                        proof.append(pr2.right)
-                        print ('  proof =', proof)
-                    else:
-                        print('That is not an acceptable use of >E.')
-                elif rule[0] == '=E1':
-                    if type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                       Bicond and str(pr1[0]) == str(pr2.left):
-                        proof.append(pr2.right)
-                        print ('  proof =', proof)
-                    elif (not type(pr1) == list) and type(pr2) == list and \
-                         len(pr2) == 1 and type(pr2[0]) == Bicond and \
-                         str(pr1) == str(pr2[0].left):
-                        proof.append(pr2[0].right)
-                        print ('  proof =', proof)
-                    elif type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                         list and len(pr2) == 1 and type(pr2[0]) == Bicond \
-                         and str(pr1[0]) == str(pr2[0].left):
-                        proof.append(pr2[0].right)
-                        print('  proof =', proof)
-                    elif (not type(pr1) == list) and type(pr2) == Bicond\
-                         and str(pr1) == str(pr2.left):
-                        proof.append(pr2.right)
-                        print ('  proof =', proof)
-                    else:
-                        print('That is not an acceptable use of =E1.')
-                elif rule[0] == '=E2':
-                    if type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                       Bicond and str(pr1[0]) == str(pr2.right):
-                        proof.append(pr2.left)
-                        print ('  proof =', proof)
-                    elif (not type(pr1) == list) and type(pr2) == list and \
-                         len(pr2) == 1 and type(pr2[0]) == Bicond and \
-                         str(pr1) == str(pr2[0].right):
-                        proof.append(pr2[0].left)
-                        print ('  proof =', proof)
-                    elif type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                         list and len(pr2) == 1 and type(pr2[0]) == Bicond \
-                         and str(pr1[0]) == str(pr2[0].right):
-                        proof.append(pr2[0].left)
-                        print('  proof =', proof)
-                    elif (not type(pr1) == list) and type(pr2) == Bicond\
-                         and str(pr1) == str(pr2.right):
-                        proof.append(pr2.left)
-                        print ('  proof =', proof)
-                    else:
-                        print('That is not an acceptable use of =E2.')
-                elif rule[0] == 'Assume':
-                    #here we begin a subproof with an assumption specified by the user, now contained within a single-element
-                    #list (see README for details)
-                    #this if condition catches user input errors (parse will print an error message)
-                    if parse(tokenize(rule[1])) == None:
-                        print ('  proof =', proof)
-                    else:
-                        assumption = parse(tokenize(rule[1]))
-                        proof.append([assumption])
-                        print ('  proof =', proof)
-                elif rule[0] == 'FI':
-                    if type(pr2) == Not and str(pr2.formula) == str(pr1):
-                        proof.append(TruthValue(False))
-                        print ('  proof =', proof)
-                    elif type(pr2) == list and len(pr2) == 1 and \
-                        type(pr2[0]) == Not and str(pr2[0].formula) == str(pr1):
-                        proof.append(TruthValue(False))
-                        print ('  proof =', proof)
-                    elif type(pr1) == list and len(pr1) == 1 and \
-                         type(pr2) == Not and str(pr2.formula) == str(pr1[0]):
-                        proof.append(TruthValue(False))
-                        print ('  proof =', proof)
-                    elif type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                         list and len(pr2) == 1 and type(pr2[0]) == Not and \
-                         str(pr2[0].formula) == str(pr1[0]):
-                        proof.append(TruthValue(False))
-                        print ('  proof =', proof)
-                    else:
-                        print ('That is not a contradiction.')
-                elif rule[0] == 'FE':
-                    #here we ask the user to provide a formula, which will be added to the proof as a consequence of the 
-                    #contradiction specified by the user
-                    if type(pr1) == TruthValue and pr1.value == False:
-                        e = input('Please provide a formula: ')
-                        if parse(tokenize(e)) == None:
-                            print ('  proof =', proof)
-                        else:
-                            proof.append(parse(tokenize(e)))
-                            print ('  proof =', proof)
-                    elif type(pr1) == list and len(pr1) == 1 and \
-                         type(pr1[0]) == TruthValue and pr1[0].value == False:
-                        e = input('Please provide a formula: ')
-                        if parse(tokenize(e)) == None:
-                            print ('  proof =', proof)
-                        else: 
-                            proof.append(parse(tokenize(e)))
-                            print ('  proof =', proof)
-                    else:
-                        print ('That is not a contradiction.')
-                elif rule[0] == '~I':
-                    #here we must first make sure additional subproofs within the specified subproof have been closed, which 
-                    #is accomplished with a for loop checking for additional single-element lists (corresponding to the 
-                    #beginning of additional open subproofs); see README for details
-                    nested = False
-                    for n in range(int(rule[1]) + 1, len(proof)):
-                        if type(proof[n]) == list and len(proof[n]) == 1:
-                            print('You must first close the current subproof.')
-                            nested = True
-                    if type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                       TruthValue and pr2.value == False and nested == False:
-                        subproof = []
-                        for n in range(int(rule[1]), int(rule[2]) + 1):
-                            subproof.append(proof[n])
-                        proof = proof[:int(rule[1])]
-                        proof.append(subproof)
-                        proof.append(Not(pr1[0]))
-                        print ('  proof =', proof)
-                    else:
-                        print ('That is not an acceptable use of ~I.')
-                elif rule[0] == 'R':
-                    if type(pr1) == list and len(pr1) == 1:
-                        proof.append(pr1[0])
-                        print ('  proof =', proof)
-                    else:
-                        proof.append(pr1)
-                        print ('  proof =', proof)
-                elif rule[0] == '>I':
-                    #just as with rule '~I' above, we must first check for additional subproofs with a for loop
-                    nested = False
-                    for n in range(int(rule[1]) + 1, len(proof)):
-                        if type(proof[n]) == list and len(proof[n]) == 1:
-                            print('You must first close the current subproof.')
-                            nested = True
-                    if type(pr1) == list and len(pr1) == 1 and nested == False:
-                        subproof = []
-                        for n in range(int(rule[1]), len(proof)):
-                            subproof.append(proof[n])
-                        proof = proof[:int(rule[1])]
-                        proof.append(subproof)
-                        proof.append(Implies(pr1[0], pr2))
-                        print ('  proof =', proof)
-                    else:
-                        print('That is not an acceptable use of >I.')
-                elif rule[0] == 'TI':
-                    proof.append(TruthValue(True))
-                    print ('  proof =', proof)
-                elif rule[0] == '=I':
-                    if type(pr1) == Implies and type(pr2) == Implies and \
-                       str(pr1.left) == str(pr2.right) and str(pr1.right) == \
-                       str(pr2.left):
-                        proof.append(Bicond(pr1.left, pr1.right))
-                        print ('  proof =', proof)
-                    elif type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                         Implies and str(pr1[0].left) == str(pr2.right) and \
-                         str(pr1[0].right) == str(pr2.left):
-                        proof.append(Bicond(pr1[0].left, pr1[0].right))
-                        print ('  proof =', proof)
-                    elif type(pr1) == Implies and type(pr2) == list and \
-                         len(pr2) == 1 and str(pr1.left) == str(pr2[0].right) \
-                         and str(pr1.right) == str(pr2[0].left):
-                        proof.append(Bicond(pr1.left, pr1.right))
-                        print ('  proof =', proof)
-                    elif type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                         list and len(pr2) == 1 and str(pr1[0].left) == \
-                         str(pr2[0].right) and str(pr1[0].right) == \
-                         str(pr2[0].left):
-                        proof.append(Bicond(pr1[0].left, pr1[0].right))
-                        print ('  proof =', proof)
-                    else:
-                        print ('That is not an acceptable use of =I.')
-                elif rule[0] == 'vI1':
-                    e = input('Please provide a formula: ')
-                    if parse(tokenize(e)) == None:
-                        print ('  proof =', proof)
-                    else:
-                        if type(pr1) == list and len(pr1) == 1:
-                            proof.append(Or(pr1[0], parse(tokenize(e))))
-                            print ('  proof =', proof)
-                        else:
-                            proof.append(Or(pr1, parse(tokenize(e))))
-                            print ('  proof =', proof)
-                elif rule[0] == 'vI2':
-                    e = input('Please provide a formula: ')
-                    if parse(tokenize(e)) == None:
-                        print ('  proof =', proof)
-                    else: 
-                        if type(pr1) == list and len(pr1) == 1:
-                            proof.append(Or(parse(tokenize(e)), pr1[0]))
-                            print ('  proof =', proof)
-                        else:
-                            proof.append(Or(parse(tokenize(e)), pr1))
-                            print ('  proof =', proof)
-                elif rule[0] == 'vE':
-                    if type(pr1) == Or and type(pr2) == Implies and type(pr3) \
-                       == Implies and str(pr1.left) == str(pr2.left) and \
-                       str(pr1.right) == str(pr3.left) and str(pr2.right) \
-                       == str(pr3.right):
-                        proof.append(pr2.right)
-                        print ('  proof =', proof)
-                    elif type(pr1) == list and len(pr1) == 1 and type(pr2) == \
-                         Implies and type(pr3) == Implies and str(pr1[0].left) \
-                         == str(pr2.left) and str(pr1[0].right) == \
-                         str(pr3.left) and str(pr2.right) == str(pr3.right):
-                        proof.append(pr2.right)
-                        print ('  proof =', proof)
-                    elif type(pr2) == list or type(pr3) == list:
-                        print ('Conditionals cannot be assumptions.', \
-                               'Use rule R to discharge assumptions.')
+                    proof.addSubproof(lines)
+            elif stack:
+                stack[-1].append(('line' if kind == LINE else 'assumption', self.toFormula(node)))
+            elif kind == LINE:
+                proof.derive(self.toFormula(node))
+            else:
+                proof.assume(self.toFormula(node))
+        return proof
+
+    #the memory map stays open as long as views of it are in use, and is closed by close()
+    def close(self):
+        for column in [self.ops, self.lefts, self.rights, self.roots, self.proofTable, self.names.offsets, self.names.text]:
+            if isinstance(column, memoryview):
+                column.release()
+        self.map.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exception):
+        self.close()
+
+#this function opens an archive written by saveArchive
+def openArchive(path):
+    return FormulaArchive(path)
+
+#the functions below search automatically for a proof of a goal from premises, using the same inference rules as prover(); 
+#within every subproof the elimination rules are applied forwards until nothing new follows, while the goal is broken down 
+#backwards by the introduction rules (together with modus ponens and biconditional elimination on the available conditionals,
+#disjunction elimination and, as a last resort, proof by contradiction); the search is iteratively deepened, remembers 
+#subgoals that were already proved or shown to fail, and skips subgoals which would repeat one of their own ancestors
+
+#this exception stops a proof search which has run out of time or nodes
+class SearchExhausted(Exception):
+    pass
+
+#a search context is the set of formulas available at some point of a proof, each mapped to its justification: ('premise',) 
+#or ('assumption',), or an elimination rule together with the formulas it was applied to; two contexts with the same 
+#formulas and justifications share their key, so that what is learned about one holds for the other
+class SearchContext:
+    def __init__(self, facts):
+        self.facts = facts
+        saturate(self.facts)
+        self.key = frozenset(self.facts.items())
+        self.subformulaList = None
+
+    #this method returns the subformulas of the facts which are not facts themselves, each once
+    def subformulas(self):
+        if self.subformulaList == None:
+            seen = set()
+            self.subformulaList = []
+            stack = list(self.facts)
+            while stack:
+                node = stack.pop()
+                if node in seen:
+                    continue
+                seen.add(node)
+                if not node in self.facts:
+                    self.subformulaList.append(node)
+                if isinstance(node, BinaryOp):
+                    stack.append(node.right)
+                    stack.append(node.left)
+                elif type(node) == Not:
+                    stack.append(node.formula)
+        return self.subformulaList
+
+    #this method returns the context of a subproof beginning with the given assumption
+    def assume(self, formula):
+        facts = dict(self.facts)
+        facts[formula] = ('assumption',)
+        return SearchContext(facts)
+
+#this function adds to a dictionary of facts everything that follows from them by the elimination rules ^E1, ^E2, ~E, >E, =E1,
+#=E2 and FI; since the results (apart from F) are subformulas of the facts, this always ends
+def saturate(facts):
+    changed = True
+    while changed:
+        changed = False
+        for fact in list(facts):
+            consequences = []
+            if type(fact) == And:
+                consequences = [(fact.left, ('^E1', fact)), (fact.right, ('^E2', fact))]
+            elif type(fact) == Not and type(fact.formula) == Not:
+                consequences = [(fact.formula.formula, ('~E', fact))]
+            elif type(fact) == Not and fact.formula in facts:
+                consequences = [(TruthValue(False), ('FI', fact.formula, fact))]
+            elif type(fact) == Implies and fact.left in facts:
+                consequences = [(fact.right, ('>E', fact.left, fact))]
+            elif type(fact) == Bicond:
+                if fact.left in facts:
+                    consequences.append((fact.right, ('=E1', fact.left, fact)))
+                if fact.right in facts:
+                    consequences.append((fact.left, ('=E2', fact.right, fact)))
+            for (formula, justification) in consequences:
+                if not formula in facts:
+                    facts[formula] = justification
+                    changed = True
+
+#this class holds the state of a single proof search: its budgets, the subgoals being worked on (to detect cycles), the proved 
+#subgoals and the depth up to which each failed subgoal has been tried
+class ProofSearch:
+    def __init__(self, timeLimit, nodeLimit):
+        self.deadline = time.perf_counter() + timeLimit
+        self.nodeLimit = nodeLimit
+        self.nodes = 0
+        self.active = set()
+        self.proved = {}
+        self.failed = {}
+
+    #this method returns a proof term for the goal in the given context, or None if none is found within 'depth' steps; a proof
+    #term is a tuple naming the rule which concludes the goal followed by the terms (or contexts and formulas) it needs
+    def prove(self, context, goal, depth):
+        key = (context.key, goal)
+        if key in self.proved:
+            return self.proved[key]
+        if goal in context.facts:
+            return ('fact', goal, context)
+        if depth <= 0 or self.failed.get(key, 0) >= depth or key in self.active:
+            return None
+        self.nodes += 1
+        if self.nodes > self.nodeLimit or time.perf_counter() > self.deadline:
+            raise SearchExhausted()
+        self.active.add(key)
+        try:
+            term = self.strategies(context, goal, depth - 1)
+        finally:
+            self.active.discard(key)
+        if term == None:
+            self.failed[key] = depth
+        else:
+            self.proved[key] = term
+        return term
+
+    #this method tries the ways of proving a goal in turn, the cheapest first
+    def strategies(self, context, goal, depth):
+        false = TruthValue(False)
+        if false in context.facts:
+            return ('FE', self.prove(context, false, depth), goal)
+        if goal is TruthValue(True):
+            return ('TI',)
+        #the introduction rule matching the goal's main connective
+        if type(goal) == And:
+            left = self.prove(context, goal.left, depth)
+            right = left and self.prove(context, goal.right, depth)
+            if right:
+                return ('^I', left, right, goal)
+        elif type(goal) == Implies:
+            inner = context.assume(goal.left)
+            term = self.prove(inner, goal.right, depth)
+            if term:
+                return ('>I', goal.left, term, goal)
+        elif type(goal) == Bicond:
+            forward = self.prove(context, Implies(goal.left, goal.right), depth)
+            backward = forward and self.prove(context, Implies(goal.right, goal.left), depth)
+            if backward:
+                return ('=I', forward, backward, goal)
+        elif type(goal) == Not:
+            inner = context.assume(goal.formula)
+            term = self.prove(inner, false, depth)
+            if term:
+                return ('~I', goal.formula, term, goal)
+        elif type(goal) == Or:
+            term = self.prove(context, goal.left, depth)
+            if term:
+                return ('vI1', term, goal)
+            term = self.prove(context, goal.right, depth)
+            if term:
+                return ('vI2', term, goal)
+        #elimination rules used backwards: conditionals and biconditionals with the goal on one side, and negations of formulas 
+        #which would give a contradiction
+        for fact in context.facts:
+            if type(fact) == Implies and fact.right is goal:
+                term = self.prove(context, fact.left, depth)
+                if term:
+                    return ('>E', term, ('fact', fact, context), goal)
+            elif type(fact) == Bicond and fact.right is goal:
+                term = self.prove(context, fact.left, depth)
+                if term:
+                    return ('=E1', term, ('fact', fact, context), goal)
+            elif type(fact) == Bicond and fact.left is goal:
+                term = self.prove(context, fact.right, depth)
+                if term:
+                    return ('=E2', term, ('fact', fact, context), goal)
+            elif goal is false and type(fact) == Not:
+                term = self.prove(context, fact.formula, depth)
+                if term:
+                    return ('FI', term, ('fact', fact, context), goal)
+        #the same rules can be used on formulas which are not available yet but occur in the facts: a contradiction may come 
+        #from a negated subformula and its negand, and the goal may be one side of a conjunction
+        for formula in context.subformulas():
+            if goal is false and type(formula) == Not and not formula.formula is false:
+                term = self.prove(context, formula, depth)
+                other = term and self.prove(context, formula.formula, depth)
+                if other:
+                    return ('FI', other, term, goal)
+            elif type(formula) == And and (formula.left is goal or formula.right is goal):
+                term = self.prove(context, formula, depth)
+                if term:
+                    return ('^E1' if formula.left is goal else '^E2', term, goal)
+        #disjunction elimination on each available disjunction, by proving the goal from either disjunct
+        for fact in context.facts:
+            if type(fact) == Or:
+                left = self.prove(context, Implies(fact.left, goal), depth)
+                right = left and self.prove(context, Implies(fact.right, goal), depth)
+                if right:
+                    return ('vE', ('fact', fact, context), left, right, goal)
+        #proof by contradiction: assume the negation of the goal, derive F, and eliminate the resulting double negation
+        if not type(goal) == Not and not goal is false:
+            inner = context.assume(Not(goal))
+            term = self.prove(inner, false, depth)
+            if term:
+                return ('~E', ('~I', Not(goal), term, Not(Not(goal))), goal)
+        return None
+
+#this class turns a proof term into the lines of a proof script, applying each rule to a Proof as it goes so that the line 
+#numbers are right; 'scopes' maps the formulas available in each open subproof to their line numbers
+class ProofWriter:
+    def __init__(self, premises):
+        self.proof = Proof()
+        self.lines = ['Premises: ' + ', '.join(str(premise) for premise in premises)]
+        self.scopes = [{}]
+        for premise in premises:
+            self.scopes[-1].setdefault(premise, len(self.proof))
+            self.proof.assume(premise)
+
+    def position(self, formula):
+        for scope in reversed(self.scopes):
+            if formula in scope:
+                return scope[formula]
+        return None
+
+    #this method applies a rule given as a line of a proof script and returns the line number of the new line
+    def apply(self, line, formula):
+        (rule, text) = scriptRule(line)
+        (self.proof, error) = applyRule(self.proof, rule, lambda: text)
+        if error != None:
+            raise ValueError('%s: %s' % (line, error))
+        self.lines.append(line)
+        self.scopes[-1][formula] = len(self.proof) - 1
+        return len(self.proof) - 1
+
+    #this method returns the line number of an available formula, deriving it from its justification if necessary
+    def fact(self, formula, context):
+        n = self.position(formula)
+        if n != None:
+            return n
+        justification = context.facts[formula]
+        numbers = [self.fact(premise, context) for premise in justification[1:]]
+        return self.apply('%s, %s' % (justification[0], ', '.join(str(m) for m in numbers)), formula)
+
+    #this method returns the line number of a copy of the formula at line n made inside the current subproof (after line 
+    #'start'), since ~I, >I and vE need some of their lines to be derived rather than assumed or taken from outside
+    def derived(self, n, start):
+        if n > start and not self.proof.isAssumption(n):
+            return n
+        return self.apply('R, %d' % n, self.proof.formula(n))
+
+    #this method writes out a subproof: it assumes the formula, proves the conclusion and returns both line numbers, leaving 
+    #the subproof open for the caller to close
+    def subproof(self, assumption, term):
+        self.scopes.append({})
+        start = self.apply('Assume: %s' % assumption, assumption)
+        end = self.derived(self.write(term), start)
+        self.scopes.pop()
+        return (start, end)
+
+    #this method writes out a proof term and returns the line number of its conclusion
+    def write(self, term):
+        rule = term[0]
+        if rule == 'fact':
+            return self.fact(term[1], term[2])
+        elif rule == 'TI':
+            return self.apply('TI', TruthValue(True))
+        elif rule == 'FE':
+            return self.apply('FE, %d: %s' % (self.write(term[1]), term[2]), term[2])
+        elif rule == 'vI1':
+            return self.apply('vI1, %d: %s' % (self.write(term[1]), term[2].right), term[2])
+        elif rule == 'vI2':
+            return self.apply('vI2, %d: %s' % (self.write(term[1]), term[2].left), term[2])
+        elif rule == '~E':
+            return self.apply('~E, %d' % self.write(term[1]), term[2])
+        elif rule in ('>I', '~I'):
+            (start, end) = self.subproof(term[1], term[2])
+            return self.apply('%s, %d, %d' % (rule, start, end), term[3])
+        elif rule == 'vE':
+            disjunction = self.write(term[1])
+            left = self.write(term[2])
+            right = self.write(term[3])
+            left = self.derived(left, -1)
+            right = self.derived(right, -1)
+            return self.apply('vE, %d, %d, %d' % (disjunction, left, right), term[4])
+        else:
+            numbers = [self.write(part) for part in term[1:-1]]
+            return self.apply('%s, %s' % (rule, ', '.join(str(n) for n in numbers)), term[-1])
+
+#this function searches for a proof of the goal from the premises (all formulas) and returns it as a proof script which 
+#checkProof accepts, ending with the goal, or None if no proof is found within the search depth and the time (in seconds) and 
+#node budgets
+def findProof(premises, goal, maxDepth=12, timeLimit=10.0, nodeLimit=200000):
+    facts = dict((premise, ('premise',)) for premise in premises)
+    context = SearchContext(facts)
+    search = ProofSearch(timeLimit, nodeLimit)
+    term = None
+    try:
+        for depth in range(1, maxDepth + 1):
+            term = search.prove(context, goal, depth)
+            if term != None:
+                break
+    except SearchExhausted:
+        return None
+    if term == None:
+        return None
+    writer = ProofWriter(premises)
+    n = writer.write(term)
+    if n != len(writer.proof) - 1 or writer.proof.isAssumption(n):
+        writer.apply('R, %d' % n, goal)
+    return '\n'.join(writer.lines) + '\n'
+
+import csv
+import json
+import os
+import sys
+import multiprocessing
+
+#the functions below evaluate formulas non-interactively against whole datasets of truth-value assignments, stored either as CSV 
+#(a header row of variable names followed by one row of truth-values per assignment) or as JSONL (one JSON object per line 
+#mapping variable names to truth-values); the rows are streamed, so a dataset never has to fit in memory
+
+#this function converts a truth-value as written in a dataset ('T', 'F', '1', '0', 'true', 'false', or a JSON boolean) into 
+#True or False, and an empty cell into None (an unassigned variable)
+def truthValueOf(cell):
+    if cell == None or cell == '':
+        return None
+    elif type(cell) == bool:
+        return cell
+    elif str(cell).strip().lower() in ('t', '1', 'true'):
+        return True
+    elif str(cell).strip().lower() in ('f', '0', 'false'):
+        return False
+    else:
+        raise ValueError('%s is not a truth-value' % cell)
+
+#this function lazily converts lines of a dataset into env dictionaries; for CSV the header must be given separately if the lines
+#do not start with it
+def readAssignments(lines, format='csv', header=None):
+    if format == 'jsonl':
+        for line in lines:
+            if line.strip():
+                row = json.loads(line)
+                #null, like an empty CSV cell, leaves the variable unassigned
+                yield dict((name, truthValueOf(row[name])) for name in row if row[name] != None)
+    else:
+        for row in csv.reader(lines):
+            if header == None:
+                header = [name.strip() for name in row]
+            elif row:
+                env = {}
+                for (name, cell) in zip(header, row):
+                    value = truthValueOf(cell)
+                    if value != None:
+                        env[name] = value
+                yield env
+
+#this function evaluates each of the formulas once for every assignment and lazily yields a list of their truth-values per 
+#assignment (None where a formula mentions a variable the assignment leaves out); every formula is compiled once (see 
+#compileFormula above) before the assignments are read, and a formula containing an assignment raises a ValueError naming it 
+#before any row is evaluated
+def evaluateMany(formulas, assignments):
+    checkEvaluable(formulas)
+    return evaluateCompiled([compileFormula(formula) for formula in formulas], assignments)
+
+#this function raises a ValueError for the first of the formulas which contains an assignment, if any
+def checkEvaluable(formulas):
+    for formula in formulas:
+        if hasAssignment(formula):
+            raise ValueError('%s contains an assignment, which cannot be evaluated against a dataset' % formula)
+
+#this function does the work of evaluateMany once the formulas have been compiled
+def evaluateCompiled(compiled, assignments):
+    for env in assignments:
+        values = []
+        for function in compiled:
+            try:
+                values.append(function(env))
+            except KeyError:
+                values.append(None)
+        yield values
+
+#these functions write the results yielded by evaluateMany in the format of the input dataset, one row at a time
+def resultHeader(formulas, format='csv'):
+    if format == 'jsonl':
+        return ''
+    else:
+        return ','.join('"%s"' % formula for formula in formulas) + '\n'
+
+def resultRow(formulas, values, format='csv'):
+    if format == 'jsonl':
+        return json.dumps(dict((str(formula), value) for (formula, value) in zip(formulas, values))) + '\n'
+    else:
+        return ','.join('' if value == None else str(TruthValue(value)) for value in values) + '\n'
+
+#this is the worker for the process-pool mode of evaluateFile: it evaluates the lines of the dataset whose first byte lies between
+#the offsets start and end and returns the corresponding output rows as one string
+def evaluateRange(task):
+    (texts, path, start, end, format, header) = task
+    formulas = [parseTokens(tokenize(text)) for text in texts]
+    output = []
+    with open(path, 'rb') as f:
+        #a range usually starts in the middle of a line, which belongs to the previous range
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()
+        def lines():
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    break
+                yield line.decode('utf-8')
+        for values in evaluateMany(formulas, readAssignments(lines(), format, header)):
+            output.append(resultRow(formulas, values, format))
+    return ''.join(output)
+
+#this function evaluates formulas (given as strings) against the dataset stored at 'path' ('-' for standard input) and writes the
+#results to 'out' as it goes; with workers > 1 the file is split into line-aligned byte ranges which are evaluated by a pool of 
+#processes, and the results are still written in the order of the input
+def evaluateFile(texts, path, out, format=None, workers=1):
+    formulas = [parseTokens(tokenize(text)) for text in texts]
+    checkEvaluable(formulas)
+    if format == None:
+        format = 'jsonl' if path.endswith('.jsonl') or path.endswith('.json') else 'csv'
+    out.write(resultHeader(formulas, format))
+    if path == '-' or workers <= 1:
+        f = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        for values in evaluateMany(formulas, readAssignments(f, format)):
+            out.write(resultRow(formulas, values, format))
+        if not f is sys.stdin:
+            f.close()
+        return
+    header = None
+    start = 0
+    if format == 'csv':
+        with open(path, 'rb') as f:
+            header = [name.strip() for name in next(csv.reader([f.readline().decode('utf-8')]), [])]
+            start = f.tell()
+    size = os.path.getsize(path)
+    #each range is kept small enough for its results to be held in memory, and there are several ranges per worker so that 
+    #uneven ranges still keep every worker busy
+    pieces = max(workers * 4, (size - start) // (1 << 23) + 1)
+    bounds = [start + (size - start) * n // pieces for n in range(pieces + 1)]
+    tasks = [(texts, path, bounds[n], bounds[n + 1], format, header) for n in range(pieces)]
+    with multiprocessing.Pool(workers) as pool:
+        for output in pool.imap(evaluateRange, tasks):
+            out.write(output)
+
+#the functions below decide satisfiability and validity with a SAT solver instead of truth tables, which makes formulas with 
+#thousands of variables feasible; formulas are first converted into clauses (lists of nonzero integers, where n stands for the
+#n-th variable and -n for its negation, as in the DIMACS format used by other solvers)
+
+#this function converts a formula into an equisatisfiable list of clauses by the Tseitin transformation: every connective gets a
+#new variable together with clauses stating that the variable is equivalent to the connective applied to its branches, so the 
+#clauses grow linearly with the formula; it returns (clauses, numVars, numbers), where numbers maps each atomic formula's name 
+#to its variable
+#with polarity=True it makes the Plaisted-Greenbaum variant instead, which only states the half of each equivalence that is 
+#needed: a connective occurring only positively (not under an odd number of negations or left sides of conditionals) only 
+#needs its variable to imply it, and one occurring only negatively only needs the converse, which leaves out about half of 
+#the clauses; a formula containing an assignment raises a ValueError
+def tseitin(formula, polarity=False):
+    numbers = dict((name, n + 1) for (n, name) in enumerate(variablesOf(formula)))
+    numVars = len(numbers)
+    clauses = []
+    literals = {}
+    #the nodes in the order their literals were found, so that every node comes after its branches
+    order = []
+    stack = [(formula, False)]
+    while stack:
+        (node, ready) = stack.pop()
+        if node in literals:
+            continue
+        if type(node) == Not:
+            branches = [node.formula]
+        elif isinstance(node, BinaryOp):
+            branches = [node.left, node.right]
+        else:
+            branches = []
+        if not ready and branches:
+            stack.append((node, True))
+            for branch in reversed(branches):
+                stack.append((branch, False))
+            continue
+        order.append(node)
+        if type(node) == Variable:
+            literals[node] = numbers[node.name]
+        elif type(node) == Not:
+            literals[node] = -literals[node.formula]
+        elif type(node) == Assign:
+            raise ValueError('Assignments cannot be converted into clauses.')
+        else:
+            numVars += 1
+            literals[node] = numVars
+    #the polarities of the nodes, as bits: 1 if a node occurs positively and 2 if it occurs negatively (so 3 if both); they are
+    #passed down from each node to its branches, which come after it in reversed order
+    signs = {formula: 1}
+    if polarity:
+        for node in reversed(order):
+            sign = signs[node]
+            flipped = (sign & 1) << 1 | sign >> 1
+            if type(node) == Not:
+                branches = [(node.formula, flipped)]
+            elif type(node) == Implies:
+                branches = [(node.left, flipped), (node.right, sign)]
+            elif type(node) == Bicond:
+                branches = [(node.left, 3), (node.right, 3)]
+            elif isinstance(node, BinaryOp):
+                branches = [(node.left, sign), (node.right, sign)]
+            else:
+                branches = []
+            for (branch, bits) in branches:
+                signs[branch] = signs.get(branch, 0) | bits
+    for node in order:
+        if type(node) == Variable or type(node) == Not:
+            continue
+        x = literals[node]
+        if type(node) == TruthValue:
+            new = [[x] if node.value else [-x]]
+        else:
+            a = literals[node.left]
+            b = literals[node.right]
+            if type(node) == And:
+                new = [[-x, a], [-x, b], [x, -a, -b]]
+            elif type(node) == Or:
+                new = [[x, -a], [x, -b], [-x, a, b]]
+            elif type(node) == Implies:
+                new = [[x, a], [x, -b], [-x, -a, b]]
+            else:
+                new = [[-x, -a, b], [-x, a, -b], [x, a, b], [x, -a, -b]]
+        if polarity:
+            #the clauses containing -x make x imply the connective, and those containing x make the connective imply x
+            sign = signs[node]
+            new = [clause for clause in new if (sign & 1 and -x in clause) or (sign & 2 and x in clause)]
+        clauses.extend(new)
+    clauses.append([literals[formula]])
+    return (clauses, numVars, numbers)
+
+#this function returns the n-th term (counting from 0) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, ..., which spaces out the 
+#solver's restarts
+def luby(n):
+    size = 1
+    while size < n + 1:
+        size = 2 * size + 1
+    while size - 1 != n:
+        size = (size - 1) // 2
+        n = n % size
+    return (size + 1) // 2
+
+#this class is a conflict-driven clause-learning SAT solver: it propagates unit clauses using two watched literals per clause, 
+#learns a new clause from every conflict (cut at the first unique implication point) and jumps back to the level where that 
+#clause becomes unit, picks decision variables by activity (VSIDS, favouring variables involved in recent conflicts) with saved
+#phases, and restarts on the Luby schedule
+class SatSolver:
+    def __init__(self, numVars, clauses):
+        self.numVars = numVars
+        #value[v] is 1, -1 or 0 (unassigned) for variable v; level and reason record the decision level at which v was assigned
+        #and the clause which forced it (None for decisions)
+        self.value = [0] * (numVars + 1)
+        self.level = [0] * (numVars + 1)
+        self.reason = [None] * (numVars + 1)
+        self.phase = [-1] * (numVars + 1)
+        self.activity = [0.0] * (numVars + 1)
+        self.increment = 1.0
+        self.seen = [False] * (numVars + 1)
+        self.heap = [(0.0, v) for v in range(1, numVars + 1)]
+        #watches[numVars + lit] lists the clauses watching the literal lit
+        self.watches = [[] for n in range(2 * numVars + 1)]
+        self.clauses = []
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.ok = True
+        for clause in clauses:
+            self.addClause(clause)
+
+    def litValue(self, lit):
+        if lit > 0:
+            return self.value[lit]
+        else:
+            return -self.value[-lit]
+
+    def assign(self, lit, reason):
+        v = abs(lit)
+        self.value[v] = 1 if lit > 0 else -1
+        self.level[v] = len(self.limits)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    #this method adds an input clause before solving, dropping repeated literals and tautologies
+    def addClause(self, clause):
+        clause = list(dict.fromkeys(clause))
+        if any(-lit in clause for lit in clause):
+            return
+        if len(clause) == 0:
+            self.ok = False
+        elif len(clause) == 1:
+            if self.litValue(clause[0]) == -1:
+                self.ok = False
+            elif self.litValue(clause[0]) == 0:
+                self.assign(clause[0], None)
+        else:
+            self.clauses.append(clause)
+            self.watches[self.numVars + clause[0]].append(len(self.clauses) - 1)
+            self.watches[self.numVars + clause[1]].append(len(self.clauses) - 1)
+
+    #this method propagates every assignment on the trail not yet propagated and returns a clause made false by the assignments
+    #(or None); a clause is only looked at when one of its two watched literals, kept in its first two positions, becomes false
+    def propagate(self):
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[self.numVars + false]
+            kept = 0
+            n = 0
+            while n < len(watching):
+                index = watching[n]
+                n += 1
+                clause = self.clauses[index]
+                if clause[0] == false:
+                    (clause[0], clause[1]) = (clause[1], clause[0])
+                if self.litValue(clause[0]) == 1:
+                    watching[kept] = index
+                    kept += 1
+                    continue
+                for k in range(2, len(clause)):
+                    if self.litValue(clause[k]) != -1:
+                        (clause[1], clause[k]) = (clause[k], clause[1])
+                        self.watches[self.numVars + clause[1]].append(index)
+                        break
+                else:
+                    watching[kept] = index
+                    kept += 1
+                    if self.litValue(clause[0]) == -1:
+                        while n < len(watching):
+                            watching[kept] = watching[n]
+                            kept += 1
+                            n += 1
+                        del watching[kept:]
+                        return index
+                    self.assign(clause[0], index)
+            del watching[kept:]
+        return None
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[u], u) for u in range(1, self.numVars + 1) if self.value[u] == 0]
+            heapq.heapify(self.heap)
+        else:
+            heapq.heappush(self.heap, (-self.activity[v], v))
+
+    #this method derives a learnt clause from a conflict by resolving backwards along the trail until a single literal of the
+    #current decision level is left; it returns the clause (with that literal first) and the level to jump back to
+    def analyze(self, conflict):
+        seen = self.seen
+        marked = []
+        learnt = [None]
+        pending = 0
+        clause = self.clauses[conflict]
+        position = len(self.trail) - 1
+        lit = None
+        while True:
+            for q in (clause if lit == None else clause[1:]):
+                v = abs(q)
+                if not seen[v] and self.level[v] > 0:
+                    seen[v] = True
+                    marked.append(v)
+                    self.bump(v)
+                    if self.level[v] == len(self.limits):
+                        pending += 1
                     else:
-                        print ('That is not an acceptable use of vE.')
-                elif rule[0] == 'delete':
-                    #removes the last line of the proof
-                    proof = proof[:len(proof) - 1]
-                    print ('  proof =', proof)
+                        learnt.append(q)
+            while not seen[abs(self.trail[position])]:
+                position -= 1
+            lit = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reason[abs(lit)]]
+        learnt[0] = -lit
+        for v in marked:
+            seen[v] = False
+        backLevel = 0
+        for n in range(2, len(learnt)):
+            if self.level[abs(learnt[n])] > self.level[abs(learnt[1])]:
+                (learnt[1], learnt[n]) = (learnt[n], learnt[1])
+        if len(learnt) > 1:
+            backLevel = self.level[abs(learnt[1])]
+        return (learnt, backLevel)
+
+    #this method undoes every assignment made above the given decision level, saving the phases of the unassigned variables
+    def cancel(self, level):
+        if len(self.limits) > level:
+            for lit in self.trail[self.limits[level]:]:
+                v = abs(lit)
+                self.phase[v] = self.value[v]
+                self.value[v] = 0
+                self.reason[v] = None
+                heapq.heappush(self.heap, (-self.activity[v], v))
+            del self.trail[self.limits[level]:]
+            del self.limits[level:]
+            self.head = len(self.trail)
+
+    #this method returns the unassigned variable with the highest activity (or None if every variable is assigned)
+    def pickVariable(self):
+        while self.heap:
+            (activity, v) = heapq.heappop(self.heap)
+            if self.value[v] == 0:
+                return v
+        return None
+
+    #this method returns a model as a list of truth-values indexed by variable (index 0 is unused), or None if the clauses are 
+    #unsatisfiable
+    def solve(self):
+        if not self.ok:
+            return None
+        conflicts = 0
+        restarts = 0
+        limit = 100 * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict != None:
+                if len(self.limits) == 0:
+                    self.ok = False
+                    return None
+                (learnt, backLevel) = self.analyze(conflict)
+                self.cancel(backLevel)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
                 else:
-                    print ('That is not an acceptable inference rule.') 
-                
+                    self.clauses.append(learnt)
+                    self.watches[self.numVars + learnt[0]].append(len(self.clauses) - 1)
+                    self.watches[self.numVars + learnt[1]].append(len(self.clauses) - 1)
+                    self.assign(learnt[0], len(self.clauses) - 1)
+                self.increment /= 0.95
+                conflicts += 1
+                if conflicts >= limit:
+                    restarts += 1
+                    limit = conflicts + 100 * luby(restarts)
+                    self.cancel(0)
+            else:
+                if len(self.heap) > 4 * self.numVars + 100:
+                    self.heap = [(-self.activity[u], u) for u in range(1, self.numVars + 1) if self.value[u] == 0]
+                    heapq.heapify(self.heap)
+                v = self.pickVariable()
+                if v == None:
+                    return [None] + [value == 1 for value in self.value[1:]]
+                self.limits.append(len(self.trail))
+                self.assign(v if self.phase[v] == 1 else -v, None)
+
+#this function returns an env dictionary under which the formula is true, or None if the formula is unsatisfiable; a formula 
+#containing an assignment is neither, and raises a ValueError (see tseitin)
+def findModel(formula):
+    (clauses, numVars, numbers) = tseitin(formula)
+    model = SatSolver(numVars, clauses).solve()
+    if model == None:
+        return None
+    return dict((name, model[numbers[name]]) for name in numbers)
+
+#this function returns an env dictionary under which the formula is false, or None if the formula is valid
+def findCountermodel(formula):
+    return findModel(Not(formula))
+
+#these functions read and write clauses in the DIMACS CNF format ('p cnf <variables> <clauses>' followed by clauses terminated by
+#0, with comment lines starting with 'c'); readDimacs returns (clauses, numVars)
+def readDimacs(lines):
+    numVars = 0
+    clauses = []
+    clause = []
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] == 'c':
+            continue
+        #SATLIB files end with a line '%' followed by a line '0', which is not an (empty) clause
+        if line[0] == '%':
+            break
+        if line[0] == 'p':
+            numVars = int(line.split()[2])
+            continue
+        for lit in line.split():
+            if lit == '0':
+                clauses.append(clause)
+                clause = []
+            else:
+                clause.append(int(lit))
+                numVars = max(numVars, abs(int(lit)))
+    if clause:
+        clauses.append(clause)
+    return (clauses, numVars)
+
+def writeDimacs(clauses, numVars, out, numbers=None):
+    #the names of the atomic formulas are recorded in comment lines so that models can be read back
+    if numbers != None:
+        for name in numbers:
+            out.write('c %s %d\n' % (name, numbers[name]))
+    out.write('p cnf %d %d\n' % (numVars, len(clauses)))
+    for clause in clauses:
+        out.write(' '.join(str(lit) for lit in clause) + ' 0\n')
+
+#this class is a package of reduced ordered binary decision diagrams (BDDs): a formula is represented by a node testing its first
+#variable (in a fixed order) with a low branch for the variable being false and a high branch for it being true, down to the 
+#constant nodes 0 (false) and 1 (true); since every node is created through a table of unique nodes, each boolean function has 
+#exactly one node, so two formulas are equivalent exactly if their nodes are equal, and all the formulas of one BDD share their
+#common parts
+class BDD:
+    def __init__(self, order=None, cacheSize=1 << 16):
+        #var, low and high are indexed by node; var[u] is the index of the variable (in 'names') tested by node u
+        self.var = [None, None]
+        self.low = [None, None]
+        self.high = [None, None]
+        self.unique = {}
+        #levelOf[v] is the position of variable v in the order and varAt[level] the variable at that position
+        self.names = []
+        self.numbers = {}
+        self.levelOf = []
+        self.varAt = []
+        self.nodesOf = []
+        #the results of apply are memoized in a bounded cache, the oldest entries being evicted first
+        self.cache = {}
+        self.cacheSize = cacheSize
+        self.roots = set()
+        for name in (order or []):
+            self.variable(name)
+
+    def level(self, u):
+        if u < 2:
+            return len(self.names)
+        else:
+            return self.levelOf[self.var[u]]
+
+    #this method returns the node testing variable v with the given branches, creating it if necessary
+    def mk(self, v, low, high):
+        if low == high:
+            return low
+        key = (v, low, high)
+        u = self.unique.get(key)
+        if u == None:
+            u = len(self.var)
+            self.var.append(v)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = u
+            self.nodesOf[v].add(u)
+        return u
+
+    #this method returns the node of an atomic formula, adding the variable at the end of the order if it is new
+    def variable(self, name):
+        if not name in self.numbers:
+            self.numbers[name] = len(self.names)
+            self.names.append(name)
+            self.levelOf.append(len(self.varAt))
+            self.varAt.append(self.numbers[name])
+            self.nodesOf.append(set())
+        return self.mk(self.numbers[name], 0, 1)
+
+    #this method returns the result of op ('^', 'v', '>' or '=') when one of the arguments is constant or both are equal, and 
+    #None otherwise
+    def terminal(self, op, a, b):
+        if op == '^':
+            if a == 0 or b == 0:
+                return 0
+            elif a == 1 or a == b:
+                return b
+            elif b == 1:
+                return a
+        elif op == 'v':
+            if a == 1 or b == 1:
+                return 1
+            elif a == 0 or a == b:
+                return b
+            elif b == 0:
+                return a
+        elif op == '>':
+            if a == 0 or b == 1 or a == b:
+                return 1
+            elif a == 1:
+                return b
+        else:
+            if a == b:
+                return 1
+            elif a == 1:
+                return b
+            elif b == 1:
+                return a
+        return None
+
+    #this method combines two nodes with a binary connective by the usual simultaneous descent through both diagrams, using an 
+    #explicit stack rather than recursion
+    def apply(self, op, a, b):
+        done = {}
+        stack = [(a, b)]
+        while stack:
+            (f, g) = stack[-1]
+            key = (op, f, g)
+            if key in done:
+                stack.pop()
+                continue
+            result = self.terminal(op, f, g)
+            if result == None:
+                result = self.cache.get(key)
+            if result != None:
+                done[key] = result
+                stack.pop()
+                continue
+            top = min(self.level(f), self.level(g))
+            (f0, f1) = (self.low[f], self.high[f]) if self.level(f) == top else (f, f)
+            (g0, g1) = (self.low[g], self.high[g]) if self.level(g) == top else (g, g)
+            if (op, f0, g0) in done and (op, f1, g1) in done:
+                result = self.mk(self.varAt[top], done[(op, f0, g0)], done[(op, f1, g1)])
+                done[key] = result
+                if len(self.cache) >= self.cacheSize:
+                    del self.cache[next(iter(self.cache))]
+                self.cache[key] = result
+                stack.pop()
+            else:
+                stack.append((f1, g1))
+                stack.append((f0, g0))
+        return done[(op, a, b)]
+
+    #a negation is the biconditional with the constant false
+    def neg(self, u):
+        return self.apply('=', u, 0)
+
+    #this method converts a formula into a node; the resulting nodes are remembered as roots, which are the nodes kept (and 
+    #measured) by reorder; a formula containing an assignment raises a ValueError before any node is made
+    def toBdd(self, formula):
+        if hasAssignment(formula):
+            raise ValueError('Assignments do not have binary decision diagrams.')
+        nodes = {}
+        stack = [(formula, False)]
+        while stack:
+            (node, ready) = stack.pop()
+            if node in nodes:
+                continue
+            if type(node) == Not:
+                branches = [node.formula]
+            elif isinstance(node, BinaryOp):
+                branches = [node.left, node.right]
+            else:
+                branches = []
+            if not ready and branches:
+                stack.append((node, True))
+                for branch in reversed(branches):
+                    stack.append((branch, False))
+                continue
+            if type(node) == Variable:
+                nodes[node] = self.variable(node.name)
+            elif type(node) == TruthValue:
+                nodes[node] = 1 if node.value else 0
+            elif type(node) == Not:
+                nodes[node] = self.neg(nodes[node.formula])
+            else:
+                nodes[node] = self.apply(node.opStr, nodes[node.left], nodes[node.right])
+        self.roots.add(nodes[formula])
+        return nodes[formula]
+
+    #two nodes represent equivalent formulas exactly if they are the same node
+    def equivalent(self, a, b):
+        return a == b
+
+    #this method lists the nodes reachable from the given nodes (all the roots by default), children before parents
+    def reachable(self, nodes=None):
+        order = []
+        seen = set([0, 1])
+        stack = [(u, False) for u in (self.roots if nodes == None else nodes)]
+        while stack:
+            (u, ready) = stack.pop()
+            if ready:
+                order.append(u)
+            elif not u in seen:
+                seen.add(u)
+                stack.append((u, True))
+                stack.append((self.high[u], False))
+                stack.append((self.low[u], False))
+        return order
+
+    #this method returns the number of assignments to all of the BDD's variables that make the node true, in time linear in the
+    #size of the node
+    def countModels(self, u):
+        counts = {0: 0, 1: 1}
+        for w in self.reachable([u]):
+            low = self.low[w]
+            high = self.high[w]
+            counts[w] = counts[low] * 2 ** (self.level(low) - self.level(w) - 1) + \
+                        counts[high] * 2 ** (self.level(high) - self.level(w) - 1)
+        return counts[u] * 2 ** self.level(u)
+
+    #this method yields every assignment (as an env dictionary) to the given variables (by default those the node depends on) 
+    #which makes the node true, by following each path to the constant 1 and filling in the variables the path does not test
+    def models(self, u, names=None):
+        if names == None:
+            names = [self.names[self.var[w]] for w in self.reachable([u])]
+            names = sorted(set(names), key=lambda name: self.levelOf[self.numbers[name]])
+        stack = [(u, {})]
+        while stack:
+            (w, path) = stack.pop()
+            if w == 1:
+                free = [name for name in names if not name in path]
+                for n in range(2 ** len(free)):
+                    env = dict(path)
+                    for (j, name) in enumerate(free):
+                        env[name] = bool((n >> j) & 1)
+                    yield env
+            elif w != 0:
+                name = self.names[self.var[w]]
+                stack.append((self.high[w], dict(path, **{name: True})))
+                stack.append((self.low[w], dict(path, **{name: False})))
+
+    #this method returns the number of nodes needed for all the roots
+    def size(self):
+        return len(self.reachable())
+
+    #this method forgets the nodes not reachable from the roots (so that nodes which are not roots must not be used after it)
+    def collect(self):
+        live = set(self.reachable())
+        for key in list(self.unique):
+            if not self.unique[key] in live:
+                self.nodesOf[key[0]].discard(self.unique.pop(key))
+        self.cache.clear()
+
+    #this method swaps the variables at levels i and i + 1 in place: every node keeps its number and its meaning, so roots and 
+    #cached results stay valid, but a node testing the upper variable x whose branches test the lower variable y is rewritten 
+    #to test y first
+    def swap(self, i):
+        x = self.varAt[i]
+        y = self.varAt[i + 1]
+        for f in list(self.nodesOf[x]):
+            (f0, f1) = (self.low[f], self.high[f])
+            if self.var[f0] != y and self.var[f1] != y:
+                continue
+            (f00, f01) = (self.low[f0], self.high[f0]) if self.var[f0] == y else (f0, f0)
+            (f10, f11) = (self.low[f1], self.high[f1]) if self.var[f1] == y else (f1, f1)
+            del self.unique[(x, f0, f1)]
+            self.nodesOf[x].remove(f)
+            low = self.mk(x, f00, f10)
+            high = self.mk(x, f01, f11)
+            (self.var[f], self.low[f], self.high[f]) = (y, low, high)
+            self.unique[(y, low, high)] = f
+            self.nodesOf[y].add(f)
+        (self.varAt[i], self.varAt[i + 1]) = (y, x)
+        (self.levelOf[x], self.levelOf[y]) = (i + 1, i)
+
+    #this method dynamically reorders the variables by sifting: each variable in turn (starting with those tested by the most 
+    #nodes) is moved through every level by adjacent swaps and left where the roots need the fewest nodes
+    def reorder(self):
+        self.collect()
+        for x in sorted(range(len(self.names)), key=lambda v: -len(self.nodesOf[v])):
+            best = self.size()
+            bestLevel = self.levelOf[x]
+            while self.levelOf[x] < len(self.names) - 1:
+                self.swap(self.levelOf[x])
+                if self.size() < best:
+                    (best, bestLevel) = (self.size(), self.levelOf[x])
+            while self.levelOf[x] > 0:
+                self.swap(self.levelOf[x] - 1)
+                if self.size() < best:
+                    (best, bestLevel) = (self.size(), self.levelOf[x])
+            while self.levelOf[x] < bestLevel:
+                self.swap(self.levelOf[x])
+            self.collect()
+        return [self.names[v] for v in self.varAt]
+
+#the functions below are an optional instrumentation layer which counts and times the hot paths of the program: tokenizing, 
+#listMaker, parsing, the eval method of each node type, the evaluator's session updates, each inference rule applied by 
+#applyRule (in prover() and checkProof) and the rendering of proofs and proof lines for prover's output; it is switched on with 
+#enableInstrumentation(), which replaces those functions and methods by timed wrappers, and switched off again with 
+#disableInstrumentation(), which puts the originals back, so while it is off it costs nothing at all; times are inclusive (the 
+#time of an eval includes the evals of its branches)
+
+import marshal
+
+#this class holds the statistics: for each name, the number of calls, the number of those which failed (raised an exception or,
+#for rules, returned an error message), the total time and the longest time in seconds
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def record(self, name, seconds, failed=False):
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry == None:
+                entry = self.entries[name] = [0, 0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += failed
+            entry[2] += seconds
+            entry[3] = max(entry[3], seconds)
+
+    def reset(self):
+        with self.lock:
+            self.entries = {}
+
+    #this method returns a copy of the statistics as a dictionary from names to dictionaries with the keys 'calls', 'failures',
+    #'seconds' and 'max'
+    def snapshot(self):
+        with self.lock:
+            return dict((name, {'calls': entry[0], 'failures': entry[1], 'seconds': entry[2], 'max': entry[3]})
+                        for (name, entry) in self.entries.items())
+
+stats = Stats()
+
+#the replaced functions and methods, as (owner, attribute, original) triples, where owner is None for module-level functions
+instrumented = []
+
+#this function returns a wrapper of function which records each call under 'name'
+def timed(name, function):
+    def wrapper(*arguments, **keywords):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = function(*arguments, **keywords)
+            failed = False
+            return result
+        finally:
+            stats.record(name, time.perf_counter() - start, failed)
+    wrapper.__wrapped__ = function
+    return wrapper
+
+#this function returns a wrapper of applyRule which records each call under the name of the rule applied, e.g. 'rule ^E1'
+def timedRule(function):
+    def wrapper(proof, rule, ask):
+        start = time.perf_counter()
+        (proof, error) = function(proof, rule, ask)
+        name = rule[0] if len(rule) > 0 and rule[0] in ruleArity else 'unknown'
+        stats.record('rule ' + name, time.perf_counter() - start, error != None)
+        return (proof, error)
+    wrapper.__wrapped__ = function
+    return wrapper
+
+#this function switches the instrumentation on (doing nothing if it is already on)
+def enableInstrumentation():
+    if instrumented:
+        return
+    def replace(owner, attribute, wrapper):
+        if owner == None:
+            instrumented.append((None, attribute, globals()[attribute]))
+            globals()[attribute] = wrapper
+        else:
+            instrumented.append((owner, attribute, owner.__dict__[attribute]))
+            setattr(owner, attribute, wrapper)
+    for name in ['tokenize', 'listMaker', 'parseTokens', 'parseText']:
+        replace(None, name, timed(name, globals()[name]))
+    replace(None, 'applyRule', timedRule(applyRule))
+    for cls in [Not, And, Or, Implies, Bicond, Assign, Variable, TruthValue]:
+        replace(cls, 'eval', timed('eval ' + cls.__name__, cls.__dict__['eval']))
+    replace(Session, 'watch', timed('session watch', Session.watch))
+    replace(Session, 'assign', timed('session assign', Session.assign))
+    replace(Proof, '__str__', timed('render proof', Proof.__str__))
+    replace(Proof, 'text', timed('render proof line', Proof.text))
+
+#this function switches the instrumentation off again; the statistics are kept until stats.reset() is called
+def disableInstrumentation():
+    while instrumented:
+        (owner, attribute, original) = instrumented.pop()
+        if owner == None:
+            globals()[attribute] = original
+        else:
+            setattr(owner, attribute, original)
+
+#this function returns the statistics in the Prometheus text format
+def prometheusText(snapshot=None):
+    if snapshot == None:
+        snapshot = stats.snapshot()
+    metrics = [('sentential_calls_total', 'counter', 'Number of calls.', 'calls'),
+               ('sentential_failures_total', 'counter', 'Number of calls which failed.', 'failures'),
+               ('sentential_seconds_total', 'counter', 'Total time spent in seconds.', 'seconds'),
+               ('sentential_seconds_max', 'gauge', 'Longest single call in seconds.', 'max')]
+    lines = []
+    for (metric, kind, description, key) in metrics:
+        lines.append('# HELP %s %s' % (metric, description))
+        lines.append('# TYPE %s %s' % (metric, kind))
+        for name in sorted(snapshot):
+            lines.append('%s{name="%s"} %r' % (metric, name.replace('\\', '\\\\').replace('"', '\\"'), snapshot[name][key]))
+    return '\n'.join(lines) + '\n'
+
+#this function returns the statistics in the format cProfile saves profiles in, so that they can be read with pstats.Stats; 
+#each name appears as a function of a file called 'sentential'
+def pstatsData(snapshot=None):
+    if snapshot == None:
+        snapshot = stats.snapshot()
+    return marshal.dumps(dict((('sentential', 0, name), (entry['calls'], entry['calls'], entry['seconds'], entry['seconds'], {}))
+                              for (name, entry) in snapshot.items()))
+
+#this function writes the statistics to a file in the given format ('prometheus' or 'pstats'), replacing the file in one step 
+#so that a reader never sees it half written
+def writeStats(path, format='prometheus'):
+    if format == 'pstats':
+        (data, mode) = (pstatsData(), 'wb')
+    else:
+        (data, mode) = (prometheusText(), 'w')
+    temporary = path + '.tmp'
+    with open(temporary, mode) as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+#this class is a background thread which writes the statistics to a file every 'interval' seconds until stop() is called (and
+#once more when it stops)
+class StatsDumper(threading.Thread):
+    def __init__(self, path, interval=10.0, format='prometheus'):
+        threading.Thread.__init__(self, daemon=True)
+        self.path = path
+        self.interval = interval
+        self.format = format
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            writeStats(self.path, self.format)
+        writeStats(self.path, self.format)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+#the classes below serve evaluator() and prover() sessions to many users at once from a single process, over TCP or a Unix 
+#socket; the protocol is line based (UTF-8): the server sends a prompt on a line of its own, the client answers with one line,
+#the server sends back what the interactive function would have printed followed by the next prompt, and so on; the first 
+#prompt asks for 'evaluator' or 'prover', after which the session works exactly like the chosen function, except that the 
+#formula asked for by 'FE', 'vI1' and 'vI2' may also be given after a ':' on the same line as the rule (as in proof scripts);
+#'exit' ends the session and closes the connection
+#
+#the connections are handled by asyncio, while the inputs are handled by a pool of 'workers' threads, so that the event loop 
+#goes on accepting connections, reading lines and closing idle sessions while inputs are handled, and the inputs of different 
+#sessions are handled at the same time; Python runs one thread at a time, so they share the processor, but a slow input (a 
+#long evaluation or a large proof) no longer holds up the replies to everyone else until it is done: the others are handled 
+#in turns with it rather than queued behind it (the inputs of one session are still handled one at a time, in order); the 
+#table of formulas is safe to share between the threads (see tableLock), and the output each thread prints is captured 
+#separately (see ThreadOutput); sessions without input for 'idleTimeout' seconds are closed, as are sessions whose environment 
+#or proof grows beyond 'maxItems' assignments and watched formulas or proof lines, and lines longer than 'maxLine' bytes are 
+#refused
+
+import asyncio
+import concurrent.futures
+import io
+
+#this exception is raised by the 'ask' function of a server prover session when a rule needs a formula which has not been given
+class FormulaNeeded(Exception):
+    pass
+
+#this class is a server session of evaluator(); step handles a line of input and returns the next prompt
+class EvaluatorService:
+    def __init__(self):
+        self.session = Session()
+
+    def step(self, line):
+        evaluatorStep(self.session, line)
+        return '%'
+
+    def size(self):
+        return len(self.session.env) + len(self.session.watched)
+
+#this class is a server session of prover(); when a rule needs a formula that was not given inline, the rule is kept until the
+#formula arrives on the next line
+class ProverService:
+    def __init__(self):
+        self.session = ProverSession()
+        self.pending = None
+
+    def step(self, line):
+        if self.session.proof == None:
+            if not self.session.start(line):
+                return 'Please state the premises: '
+            return 'Please apply an inference rule: '
+        if self.pending != None:
+            (rule, formula) = (self.pending, line)
+            self.pending = None
+        elif line.strip() == 'show':
+            self.session.show()
+            return 'Please apply an inference rule: '
+        else:
+            (rule, formula) = scriptRule(line)
+        def ask():
+            if formula == None:
+                raise FormulaNeeded()
+            return formula
+        try:
+            self.session.apply(rule, ask)
+        except FormulaNeeded:
+            self.pending = rule
+            return 'Please provide a formula: '
+        return 'Please apply an inference rule: '
+
+    def size(self):
+        if self.session.proof == None:
+            return 0
+        return self.session.proof.size
+
+#print() writes to sys.stdout, which all threads share, so while a server runs sys.stdout is replaced by this object, which 
+#sends what each thread prints to the buffer that thread is capturing into, if any, and everything else to the original stream
+class ThreadOutput:
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def target(self):
+        buffer = getattr(self.local, 'buffer', None)
+        return self.stream if buffer == None else buffer
+
+    def write(self, text):
+        return self.target().write(text)
+
+    def flush(self):
+        self.target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+#this function installs a ThreadOutput as sys.stdout (unless there is one already) and returns it
+def threadOutput():
+    if not isinstance(sys.stdout, ThreadOutput):
+        sys.stdout = ThreadOutput(sys.stdout)
+    return sys.stdout
+
+#this function handles a line in a session, returning its printed output and the next prompt
+def serviceStep(service, line):
+    output = threadOutput()
+    output.local.buffer = io.StringIO()
+    try:
+        prompt = service.step(line)
+        return (output.local.buffer.getvalue(), prompt)
+    finally:
+        output.local.buffer = None
+
+services = {'evaluator': EvaluatorService, 'prover': ProverService}
+
+class LogicServer:
+    def __init__(self, idleTimeout=600.0, maxSessions=10000, maxItems=10000, maxLine=1 << 16, workers=8):
+        self.idleTimeout = idleTimeout
+        self.maxSessions = maxSessions
+        self.maxItems = maxItems
+        self.maxLine = maxLine
+        self.sessions = 0
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+
+    #this method starts listening on a TCP port (or on a Unix socket if 'path' is given) and returns the asyncio server; the 
+    #backlog of connections waiting to be accepted is made long enough for many clients connecting at once
+    async def start(self, host=None, port=0, path=None, backlog=4096):
+        threadOutput()
+        if path != None:
+            return await asyncio.start_unix_server(self.handle, path, limit=self.maxLine, backlog=backlog)
+        return await asyncio.start_server(self.handle, host, port, limit=self.maxLine, backlog=backlog)
+
+    async def handle(self, reader, writer):
+        try:
+            if self.sessions >= self.maxSessions:
+                writer.write(b'The server is busy, please try again later.\n')
+                await writer.drain()
+                return
+            self.sessions += 1
+            try:
+                await self.converse(reader, writer)
+            finally:
+                self.sessions -= 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    #this method runs a session: it sends the prompt, waits for a line and handles it, until the session ends
+    async def converse(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        service = None
+        prompt = "Please choose 'evaluator' or 'prover': "
+        while True:
+            writer.write(prompt.encode('utf-8') + b'\n')
+            await writer.drain()
+            try:
+                line = await asyncio.wait_for(reader.readline(), self.idleTimeout)
+            except asyncio.TimeoutError:
+                writer.write(b'The session was closed after %g seconds without input.\n' % self.idleTimeout)
+                return
+            except ValueError:
+                writer.write(b'That line is too long.\n')
+                return
+            if not line:
+                return
+            line = line.decode('utf-8', 'replace').rstrip('\r\n')
+            if line == 'exit':
+                return
+            if service == None:
+                if line.strip() in services:
+                    service = services[line.strip()]()
+                    prompt = '%' if line.strip() == 'evaluator' else 'Please state the premises: '
+                continue
+            #an input which cannot be handled (e.g. one too deeply nested for a recursive method) gets an error line in reply,
+            #and the session goes on from the same prompt
+            try:
+                (output, prompt) = await loop.run_in_executor(self.executor, serviceStep, service, line)
+            except Exception as error:
+                output = 'That input could not be handled (%s).\n' % (type(error).__name__ if str(error) == '' else
+                                                                      '%s: %s' % (type(error).__name__, error))
+            writer.write(output.encode('utf-8'))
+            if service.size() > self.maxItems:
+                writer.write(b'The session was closed because it grew beyond %d items.\n' % self.maxItems)
+                return
+
+#this function runs a server until it is interrupted
+def serve(host=None, port=0, path=None, **limits):
+    async def run():
+        server = await LogicServer(**limits).start(host, port, path)
+        print ('Serving on', ', '.join(str(socket.getsockname()) for socket in server.sockets))
+        async with server:
+            await server.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+#the functions below rewrite formulas into normal forms: negation normal form (NNF), in which the only connectives are '^' and 
+#'v' and '~' only occurs in front of atomic formulas, and the conjunctive and disjunctive normal forms (CNF and DNF), which are 
+#conjunctions of disjunctions of such literals and the other way round; along the way 'T' and 'F' are folded away (unless the 
+#whole formula is one of them), repeated and complementary literals are merged, and clauses which contain another clause are 
+#dropped, since they follow from it (e.g. the CNF of '(p ^ (p v q))' is just 'p'); every pass works bottom-up with an explicit 
+#stack and remembers the result for each node, so a subformula shared by many parts of a formula is only rewritten once
+
+#this function returns the conjunction of two formulas in NNF, simplified: 'T' and repeated conjuncts are dropped, 'F' or a 
+#conjunct together with its negation makes the whole conjunction 'F', and a conjunct absorbs a disjunction containing it
+def conjoin(a, b):
+    if a is b or (type(b) == TruthValue and b.value) or (type(b) == Or and (b.left is a or b.right is a)):
+        return a
+    if (type(a) == TruthValue and a.value) or (type(a) == Or and (a.left is b or a.right is b)):
+        return b
+    if type(a) == TruthValue or type(b) == TruthValue or (type(a) == Not and a.formula is b) or \
+       (type(b) == Not and b.formula is a):
+        return TruthValue(False)
+    return And(a, b)
+
+#this function returns the disjunction of two formulas in NNF, simplified in the same way as conjoin
+def disjoin(a, b):
+    if a is b or (type(b) == TruthValue and not b.value) or (type(b) == And and (b.left is a or b.right is a)):
+        return a
+    if (type(a) == TruthValue and not a.value) or (type(a) == And and (a.left is b or a.right is b)):
+        return b
+    if type(a) == TruthValue or type(b) == TruthValue or (type(a) == Not and a.formula is b) or \
+       (type(b) == Not and b.formula is a):
+        return TruthValue(True)
+    return Or(a, b)
+
+#this function returns the negation normal form of a formula (raising a ValueError for an assignment); 
+#the NNF of each subformula is worked out once for each of its polarities (whether it occurs under an odd number of 
+#negations), so the result is at most about twice as large as the formula, counting shared subformulas once
+def toNnf(formula):
+    results = {}
+    stack = [(formula, True, False)]
+    while stack:
+        (node, positive, ready) = stack.pop()
+        key = (node, positive)
+        if key in results:
+            continue
+        if type(node) == Variable:
+            results[key] = node if positive else Not(node)
+            continue
+        elif type(node) == TruthValue:
+            results[key] = TruthValue(node.value == positive)
+            continue
+        elif type(node) == Assign:
+            raise ValueError('Assignments cannot be converted into normal form.')
+        #the NNFs needed from the branches, and how they are put together
+        if type(node) == Not:
+            needed = [(node.formula, not positive)]
+        elif type(node) == Implies:
+            needed = [(node.left, not positive), (node.right, positive)]
+        elif type(node) == Bicond:
+            needed = [(node.left, True), (node.right, True), (node.left, False), (node.right, False)]
+        else:
+            needed = [(node.left, positive), (node.right, positive)]
+        if not ready:
+            stack.append((node, positive, True))
+            for (branch, sign) in reversed(needed):
+                stack.append((branch, sign, False))
+            continue
+        parts = [results[branch] for branch in needed]
+        if type(node) == Not:
+            results[key] = parts[0]
+        elif type(node) == Bicond:
+            #(p = q) is ((p ^ q) v (~p ^ ~q)), and ~(p = q) is ((p ^ ~q) v (~p ^ q))
+            if positive:
+                results[key] = disjoin(conjoin(parts[0], parts[1]), conjoin(parts[2], parts[3]))
+            else:
+                results[key] = disjoin(conjoin(parts[0], parts[3]), conjoin(parts[2], parts[1]))
+        elif (type(node) == And) == positive:
+            results[key] = conjoin(parts[0], parts[1])
+        else:
+            results[key] = disjoin(parts[0], parts[1])
+    return results[(formula, True)]
+
+#this function returns the negation of a literal
+def complement(literal):
+    if type(literal) == Not:
+        return literal.formula
+    return Not(literal)
+
+#this function removes repeated clauses (frozensets of literals) and clauses containing another clause from a list, keeping the
+#order of the rest; going through the clauses from the shortest, the clauses containing one are looked for among those 
+#containing its literal which occurs in the fewest clauses, rather than among all the clauses
+def subsume(clauses):
+    clauses = list(dict.fromkeys(clauses))
+    if frozenset() in clauses:
+        return [frozenset()]
+    occurrences = {}
+    for (n, clause) in enumerate(clauses):
+        for literal in clause:
+            occurrences.setdefault(literal, []).append(n)
+    removed = [False] * len(clauses)
+    for n in sorted(range(len(clauses)), key=lambda n: len(clauses[n])):
+        if removed[n]:
+            continue
+        clause = clauses[n]
+        rarest = min(clause, key=lambda literal: len(occurrences[literal]))
+        for k in occurrences[rarest]:
+            if k != n and not removed[k] and clause <= clauses[k]:
+                removed[k] = True
+    return [clause for (n, clause) in enumerate(clauses) if not removed[n]]
+
+#this function returns the clauses of the CNF of a formula in NNF (or with conjunctive=False the conjunctions of its DNF), as 
+#a list of frozensets of literals; the clauses of a conjunction are those of its conjuncts, and those of a disjunction are 
+#the unions of a clause of each disjunct (leaving out the ones containing a literal and its negation, which are always true),
+#so the number of clauses can grow exponentially with the formula (see toCnf for a way around that)
+def normalClauses(nnf, conjunctive=True):
+    results = {}
+    outer = And if conjunctive else Or
+    stack = [nnf]
+    while stack:
+        node = stack[-1]
+        if node in results:
+            stack.pop()
+            continue
+        if type(node) == TruthValue:
+            results[node] = [] if node.value == conjunctive else [frozenset()]
+            stack.pop()
+            continue
+        elif not isinstance(node, BinaryOp):
+            results[node] = [frozenset([node])]
+            stack.pop()
+            continue
+        missing = [branch for branch in (node.right, node.left) if not branch in results]
+        if missing:
+            stack.extend(missing)
+            continue
+        stack.pop()
+        (left, right) = (results[node.left], results[node.right])
+        if type(node) == outer:
+            results[node] = subsume(left + right)
+        else:
+            product = []
+            for a in left:
+                for b in right:
+                    if not any(complement(literal) in a for literal in b):
+                        product.append(a | b)
+            results[node] = subsume(product)
+    return results[nnf]
+
+#this function puts clauses (as returned by normalClauses) back together into a formula, with the literals of each clause in 
+#the order of the names in 'order' (negated ones after unnegated ones) and the clauses in the order they are listed
+def fromClauses(clauses, order, conjunctive=True):
+    (outer, inner) = (And, Or) if conjunctive else (Or, And)
+    formula = None
+    for clause in clauses:
+        if not clause:
+            return TruthValue(not conjunctive)
+        literals = sorted(clause, key=lambda literal: (order[complement(literal).name], True) if type(literal) == Not else \
+                          (order[literal.name], False))
+        part = literals[0]
+        for literal in literals[1:]:
+            part = inner(part, literal)
+        formula = part if formula == None else outer(formula, part)
+    if formula == None:
+        return TruthValue(conjunctive)
+    return formula
+
+#this function returns the conjunctive normal form of a formula (raising a ValueError for an assignment); with
+#definitional=True it returns a definitional CNF instead, made by the Plaisted-Greenbaum transformation (see tseitin) from the
+#NNF, which stays linear in the size of the formula where the CNF can be exponential, but is only equisatisfiable with the
+#formula rather than equivalent to it: it contains new atomic formulas named 'd1', 'd2', ... (with more 'd's at the front if
+#the formula already has names of that form), and every model of the formula can be extended to one of the definitional CNF,
+#which in turn is a model of the formula
+def toCnf(formula, definitional=False):
+    nnf = toNnf(formula)
+    order = dict((name, n) for (n, name) in enumerate(variablesOf(formula)))
+    if not definitional or type(nnf) == TruthValue:
+        return fromClauses(normalClauses(nnf), order)
+    (clauses, numVars, numbers) = tseitin(nnf, polarity=True)
+    prefix = 'd'
+    while any(name.startswith(prefix) and name[len(prefix):].isdigit() for name in order):
+        prefix += 'd'
+    variables = [None] * (numVars + 1)
+    for name in numbers:
+        variables[numbers[name]] = Variable(name)
+    for n in range(len(numbers) + 1, numVars + 1):
+        variables[n] = Variable(prefix + str(n - len(numbers)))
+        order[variables[n].name] = len(order)
+    clauses = [frozenset(variables[v] if v > 0 else Not(variables[-v]) for v in clause) for clause in clauses]
+    return fromClauses(subsume(clauses), order)
+
+#this function returns the disjunctive normal form of a formula (raising a ValueError for an assignment)
+def toDnf(formula):
+    nnf = toNnf(formula)
+    order = dict((name, n) for (n, name) in enumerate(variablesOf(formula)))
+    return fromClauses(normalClauses(nnf, False), order, False)
+
+#the functions below process corpora of formulas: text with one formula per line, or several on a line separated by commas; 
+#readFormulas reads the text one line at a time and parses each formula as it comes, so a corpus of any length is processed 
+#in memory proportional to its longest line, and the other functions are stages of generator pipelines starting from it, e.g.
+#classifyEntries(readFormulas(open(path))) or saveArchive(path, formulasOf(readFormulas(sys.stdin)))
+
+#this function lazily reads formulas from lines of text (a file, sys.stdin or any iterable of strings or bytes) and yields 
+#(line, column, formula) for each of them, counting lines and columns from 1; blank entries and lines starting with '#' are 
+#skipped, and a malformed entry raises ParseError with its line and column set to where the error is, unless onError is 
+#given, in which case the error is passed to onError and reading goes on with the next entry
+def readFormulas(lines, onError=None):
+    for (number, line) in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.rstrip('\r\n')
+        if line.lstrip().startswith('#'):
+            continue
+        for (offset, text) in splitList(line, ','):
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+            try:
+                formula = parseTokens(tokens)
+            except ParseError as error:
+                #the column of the offending token, or just after the entry if it ended too early
+                matches = list(tokenPattern.finditer(text))
+                if error.offset < len(matches):
+                    position = matches[error.offset].start()
+                else:
+                    position = matches[-1].end()
+                (error.line, error.column) = (number, offset + position + 1)
+                if onError == None:
+                    raise
+                onError(error)
+                continue
+            yield (number, offset + len(text) - len(text.lstrip(' ')) + 1, formula)
+
+#this function yields just the formulas of the entries yielded by readFormulas (e.g. to be saved with saveArchive)
+def formulasOf(entries):
+    for (line, column, formula) in entries:
+        yield formula
+
+#this function yields (line, column, value) with the truth-value of each formula in the environment env, as given by 
+#formulaValue (above), so that deeply nested formulas can be evaluated and assignments in the corpus leave env as it is
+def evaluateEntries(entries, env):
+    for (line, column, formula) in entries:
+        yield (line, column, formulaValue(formula, env))
+
+#this function yields (line, column, kind) where kind says whether the formula is 'valid', 'contingent' (true under some
+#assignments and false under others) or 'unsatisfiable', as decided by the SAT solver (see findModel above); a formula containing
+#an assignment is none of these, and like a malformed entry in readFormulas it raises a ValueError giving its line and column, 
+#unless onError is given, in which case the error is passed to onError and the formula is skipped
+def classifyEntries(entries, onError=None):
+    for (line, column, formula) in entries:
+        if hasAssignment(formula):
+            error = ValueError('%s contains an assignment, which cannot be classified (line %d, column %d).' %
+                               (formula, line, column))
+            if onError == None:
+                raise error
+            onError(error)
+        elif findModel(formula) == None:
+            yield (line, column, 'unsatisfiable')
+        elif findCountermodel(formula) == None:
+            yield (line, column, 'valid')
+        else:
+            yield (line, column, 'contingent')
+
+#this function converts an assignment written as 'NAME=VALUE' on the command line into a pair (name, truth-value), raising 
+#ValueError if it is not of that form
+def assignmentOf(text):
+    (name, value) = text.split('=', 1)
+    value = truthValueOf(value)
+    if value == None or not variableTok(name.strip()):
+        raise ValueError(text)
+    return (name.strip(), value)
+
+#this function runs the 'corpus' command, printing one line per formula (its position and the formula, its truth-value or its
+#kind) or saving the formulas to an archive; it returns the number of malformed entries (and, with options.classify, of 
+#assignments), which are reported on standard error if options.keep_going is set (and otherwise stop the command)
+def corpusCommand(options):
+    errors = []
+    def report(error):
+        errors.append(error)
+        sys.stderr.write((errorMessage(error) if isinstance(error, ParseError) else str(error)) + '\n')
+    f = sys.stdin if options.file == '-' else open(options.file, encoding='utf-8')
+    try:
+        entries = readFormulas(f, report if options.keep_going else None)
+        if options.archive != None:
+            saveArchive(options.archive, formulasOf(entries))
+            return len(errors)
+        if options.assign:
+            entries = evaluateEntries(entries, dict(options.assign))
+        elif options.classify:
+            entries = classifyEntries(entries, report if options.keep_going else None)
+        for (line, column, result) in entries:
+            sys.stdout.write('%d:%d %s\n' % (line, column, result))
+    finally:
+        if not f is sys.stdin:
+            f.close()
+    return len(errors)
+
+#this function runs the 'sat' command, printing the result in the usual solver output format ('s SATISFIABLE' followed by the
+#model, or 's UNSATISFIABLE')
+def solveCommand(options):
+    if options.formula != None:
+        (clauses, numVars, numbers) = tseitin(parseTokens(tokenize(options.formula)))
+        if options.export != None:
+            with open(options.export, 'w') as out:
+                writeDimacs(clauses, numVars, out, numbers)
+            return
+    else:
+        f = sys.stdin if options.dimacs in (None, '-') else open(options.dimacs)
+        (clauses, numVars) = readDimacs(f)
+        numbers = None
+    model = SatSolver(numVars, clauses).solve()
+    if model == None:
+        print ('s UNSATISFIABLE')
+    elif numbers != None:
+        print ('s SATISFIABLE')
+        print ('v', ' '.join('%s=%s' % (name, TruthValue(model[numbers[name]])) for name in numbers))
+    else:
+        print ('s SATISFIABLE')
+        print ('v', ' '.join(str(v if model[v] else -v) for v in range(1, numVars + 1)), '0')
+
+#the program can also be run from the command line to use the non-interactive tools above; run without arguments it does nothing,
+#so it can still be loaded with 'python -i' in order to use evaluator() and prover()
+def main(arguments):
+    import argparse
+    parser = argparse.ArgumentParser(description='Sentential logic tools.')
+    parser.add_argument('--stats', metavar='PATH', help='record instrumentation statistics and write them to PATH')
+    parser.add_argument('--stats-format', choices=['prometheus', 'pstats'], default='prometheus',
+                        help='the format of the statistics file')
+    parser.add_argument('--stats-interval', type=float, metavar='SECONDS', help='also rewrite the statistics file periodically')
+    commands = parser.add_subparsers(dest='command')
+    evaluate = commands.add_parser('evaluate', help='evaluate formulas against a CSV or JSONL file of assignments')
+    evaluate.add_argument('-f', '--formula', action='append', required=True, help='a formula to evaluate (repeatable)')
+    evaluate.add_argument('data', help="the dataset of assignments ('-' for standard input)")
+    evaluate.add_argument('--format', choices=['csv', 'jsonl'], help='the dataset format (guessed from the file name by default)')
+    evaluate.add_argument('--workers', type=int, default=1, help='the number of worker processes')
+    sat = commands.add_parser('sat', help='solve a formula or a DIMACS CNF file with the SAT solver')
+    sat.add_argument('-f', '--formula', help='a formula to solve instead of a DIMACS file')
+    sat.add_argument('dimacs', nargs='?', help="a DIMACS CNF file ('-' for standard input)")
+    sat.add_argument('--export', metavar='PATH', help='write the clauses of the formula to a DIMACS file instead of solving')
+    normal = commands.add_parser('normal', help='rewrite a formula into a normal form')
+    normal.add_argument('formula', help='the formula to rewrite')
+    normal.add_argument('--form', choices=['nnf', 'cnf', 'dnf'], default='cnf', help='the normal form (CNF by default)')
+    normal.add_argument('--definitional', action='store_true', help='make a definitional CNF (only equisatisfiable)')
+    corpus = commands.add_parser('corpus', help='read a file of formulas, one per line or separated by commas')
+    corpus.add_argument('file', help="the file of formulas ('-' for standard input)")
+    corpus.add_argument('-a', '--assign', action='append', type=assignmentOf, metavar='NAME=VALUE',
+                        help='evaluate the formulas with this atomic formula assigned T or F (repeatable)')
+    corpus.add_argument('--classify', action='store_true', help='tell whether each formula is valid, contingent or unsatisfiable')
+    corpus.add_argument('--archive', metavar='PATH', help='save the formulas to an archive instead of printing them')
+    corpus.add_argument('--keep-going', action='store_true', help='report malformed formulas and go on with the rest')
+    check = commands.add_parser('check', help='check proof script files')
+    check.add_argument('files', nargs='+', help='the proof scripts to check')
+    check.add_argument('--workers', type=int, default=1, help='the number of worker processes')
+    prove = commands.add_parser('prove', help='search for a proof and print it as a proof script')
+    prove.add_argument('goal', help='the formula to prove')
+    prove.add_argument('-p', '--premises', default='', help='the premises, separated by commas')
+    prove.add_argument('--depth', type=int, default=12, help='the maximum search depth')
+    prove.add_argument('--time', type=float, default=10.0, help='the time limit in seconds')
+    server = commands.add_parser('serve', help='serve evaluator and prover sessions over TCP or a Unix socket')
+    server.add_argument('--host', help='the address to listen on (all addresses by default)')
+    server.add_argument('--port', type=int, default=7000, help='the TCP port to listen on')
+    server.add_argument('--unix', metavar='PATH', help='listen on a Unix socket instead of a TCP port')
+    server.add_argument('--idle', type=float, default=600.0, help='the seconds without input after which a session is closed')
+    server.add_argument('--max-sessions', type=int, default=10000, help='the maximum number of sessions at once')
+    server.add_argument('--max-items', type=int, default=10000, help='the maximum number of proof lines or assignments per session')
+    server.add_argument('--workers', type=int, default=8, help='the number of threads handling inputs')
+    options = parser.parse_args(arguments)
+    dumper = None
+    if options.stats != None:
+        enableInstrumentation()
+        if options.stats_interval != None:
+            dumper = StatsDumper(options.stats, options.stats_interval, options.stats_format)
+            dumper.start()
+    try:
+        if options.command == 'evaluate':
+            evaluateFile(options.formula, options.data, sys.stdout, options.format, options.workers)
+        elif options.command == 'sat':
+            solveCommand(options)
+        elif options.command == 'normal':
+            formula = parseTokens(tokenize(options.formula))
+            if options.form == 'nnf':
+                result = toNnf(formula)
+            elif options.form == 'dnf':
+                result = toDnf(formula)
+            else:
+                result = toCnf(formula, options.definitional)
+            print (result)
+        elif options.command == 'corpus':
+            if corpusCommand(options):
+                parser.exit(1)
+        elif options.command == 'check':
+            invalid = 0
+            for (path, valid, message, seconds) in checkFiles(options.files, options.workers):
+                print ('%s: %s (%.6fs)' % (path, 'valid' if valid else message, seconds))
+                invalid += not valid
+            if invalid:
+                parser.exit(1, '%d of %d proofs are not valid.\n' % (invalid, len(options.files)))
+        elif options.command == 'prove':
+            premises = [parseTokens(tokenize(pr)) for pr in listMaker(options.premises)]
+            script = findProof(premises, parseTokens(tokenize(options.goal)), options.depth, options.time)
+            if script == None:
+                parser.exit(1, 'No proof was found.\n')
+            sys.stdout.write(script)
+        elif options.command == 'serve':
+            serve(options.host, options.port, options.unix, idleTimeout=options.idle, maxSessions=options.max_sessions,
+                  maxItems=options.max_items, workers=options.workers)
+    except ParseError as error:
+        parser.exit(1, errorMessage(error) + '\n')
+    except ValueError as error:
+        parser.exit(1, '%s\n' % error)
+    finally:
+        if dumper != None:
+            dumper.stop()
+        elif options.stats != None:
+            writeStats(options.stats, options.stats_format)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,272 @@
+#this script times the main paths of Sentential-Logic.py (tokenizing, listMaker, parsing, evaluating each connective and
+#applying inference rules through prover) on generated formulas of growing size, and writes the timings as JSON so that two
+#runs can be compared; for example:
+#   python benchmark.py run -o before.json
+#   python benchmark.py run -o after.json
+#   python benchmark.py compare before.json after.json
+#the formulas are generated from a fixed seed, so every run times the same inputs
+
+import argparse
+import builtins
+import contextlib
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import signal
+import sys
+import time
+
+#this function loads Sentential-Logic.py (or another version of it) as a module; the file name contains a hyphen, so it cannot
+#simply be imported
+def loadModule(path):
+    spec = importlib.util.spec_from_file_location('sentential', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+#the generators below return formulas (as strings) of a given size n
+
+#this function returns a random formula with n binary connectives (about a fifth of the nodes are also negated), shaped like a
+#random binary search tree so that its depth grows roughly logarithmically
+def randomFormula(n, rng, names=('p', 'q', 'r', 's')):
+    pieces = []
+    stack = [n]
+    while stack:
+        item = stack.pop()
+        if type(item) == str:
+            pieces.append(item)
+        elif item == 0:
+            pieces.append(rng.choice(names))
+        else:
+            if rng.random() < 0.2:
+                pieces.append('~')
+            k = rng.randrange(item)
+            pieces.append('(')
+            stack.extend([')', item - 1 - k, ' %s ' % rng.choice('^v>='), k])
+    return ''.join(pieces)
+
+#this function returns a chain of n negations of a single variable
+def negationChain(n):
+    return '~' * n + 'p'
+
+#this function returns a balanced formula joining n + 1 distinct variables with the given connective (by default a wide
+#conjunction)
+def balancedFormula(n, op='^'):
+    items = ['p%d' % i for i in range(n + 1)]
+    while len(items) > 1:
+        paired = ['(%s %s %s)' % (items[i], op, items[i + 1]) for i in range(0, len(items) - 1, 2)]
+        if len(items) % 2:
+            paired.append(items[-1])
+        items = paired
+    return items[0]
+
+#this function returns n biconditionals nested to the right, '(p = (p = ... (p = p)...))'
+def nestedBiconditionals(n):
+    return '(p = ' * n + 'p' + ')' * n
+
+#this function returns a formula with two variables whose names are n characters long
+def longNames(n):
+    return '(%s v ~%s)' % ('a' * n, 'b' * n)
+
+#this function returns n random formulas (of 8 connectives each) separated by commas, as typed in for the premises of a proof
+def formulaList(n, rng):
+    return ', '.join(randomFormula(8, rng) for i in range(n))
+
+#this function returns the inputs for a prover session applying n inference rules: the premises, then the rules (repeating
+#>E, ^I, ^E2, Assume and >I), then 'exit'
+def ruleScript(n):
+    inputs = ['p, (p > q)']
+    size = 2
+    cycle = []
+    while len(inputs) - 1 < n:
+        if not cycle:
+            cycle = ['>E, 0, 1', '^I, 0, %d' % size, '^E2, %d' % (size + 1), 'Assume: r', '>I, %d, %d' % (size + 3, size + 3)]
+            size += 5
+        inputs.append(cycle.pop(0))
+    return inputs + ['exit']
+
+#this exception is raised (through an alarm signal) when a single measurement takes longer than the time limit
+class TimeLimit(Exception):
+    pass
+
+def alarm(signum, frame):
+    raise TimeLimit()
+
+#this function returns the fastest of 'repeat' timings (in seconds per call) of function(); very quick calls are repeated in a
+#loop so that each timing lasts at least 'minimum' seconds; if a call takes more than 'limit' seconds it raises TimeLimit
+def measure(function, repeat, limit, minimum=0.01):
+    useAlarm = hasattr(signal, 'setitimer')
+    if useAlarm:
+        previous = signal.signal(signal.SIGALRM, alarm)
+        signal.setitimer(signal.ITIMER_REAL, limit)
+    try:
+        start = time.perf_counter()
+        function()
+        first = time.perf_counter() - start
+        number = max(1, int(minimum / first)) if first > 0 else 1000
+        best = first
+        for r in range(repeat - 1 if number == 1 else repeat):
+            if useAlarm:
+                signal.setitimer(signal.ITIMER_REAL, limit * number)
+            start = time.perf_counter()
+            for i in range(number):
+                function()
+            best = min(best, (time.perf_counter() - start) / number)
+        return best
+    finally:
+        if useAlarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+#this function runs prover() on a list of inputs, throwing its output away
+def runProver(sl, inputs):
+    answers = iter(inputs)
+    original = builtins.input
+    builtins.input = lambda prompt='': next(answers)
+    try:
+        with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+            sl.prover()
+    finally:
+        builtins.input = original
+
+#this function returns the benchmarks for a loaded module as a list of (name, setup) pairs, where setup(n) prepares the input of
+#size n and returns the function to time; benchmarks needing functions the module does not have are left out
+def benchmarks(sl, seed):
+    parse = getattr(sl, 'parseTokens', None) or sl.parse
+    def formulas(name, make):
+        return [('tokenize/' + name, lambda n: (lambda s: lambda: sl.tokenize(s))(make(n))),
+                ('parse/' + name, lambda n: (lambda t: lambda: parse(t))(sl.tokenize(make(n))))]
+    #every variable is given the same value, chosen so that no branch can be skipped (False for disjunctions, True otherwise)
+    def evaluation(make, value=True):
+        def setup(n):
+            formula = parse(sl.tokenize(make(n)))
+            env = dict((name, value) for name in ['p', 'q', 'r', 's'] + ['p%d' % i for i in range(n + 1)])
+            return lambda: formula.eval(env)
+        return setup
+    result = []
+    result += formulas('random', lambda n: randomFormula(n, random.Random(seed)))
+    result += formulas('negations', negationChain)
+    result += formulas('conjunction', balancedFormula)
+    result += formulas('biconditionals', nestedBiconditionals)
+    result += formulas('names', longNames)
+    result.append(('listMaker/formulas', lambda n: (lambda s: lambda: sl.listMaker(s))(formulaList(n, random.Random(seed)))))
+    result.append(('listMaker/rule', lambda n: (lambda s: lambda: sl.listMaker(s))('vI1, %d: %s' % (n, balancedFormula(n)))))
+    result.append(('eval/~', evaluation(negationChain)))
+    for op in ['^', 'v', '>', '=']:
+        result.append(('eval/' + op, evaluation(lambda n, op=op: balancedFormula(n, op), op != 'v')))
+    result.append(('eval/:', evaluation(lambda n: '(x : %s)' % balancedFormula(n))))
+    result.append(('eval/biconditionals', evaluation(nestedBiconditionals)))
+    result.append(('eval/random', evaluation(lambda n: randomFormula(n, random.Random(seed)))))
+    result.append(('prover/rules', lambda n: (lambda inputs: lambda: runProver(sl, inputs))(ruleScript(n))))
+    if hasattr(sl, 'checkProof'):
+        result.append(('checkProof/rules', lambda n: (lambda lines: lambda: sl.checkProof(lines))(ruleScript(n)[:-1])))
+    return result
+
+#this function estimates how the time of a benchmark grows with its size: the slope of log(time) against log(size) by least
+#squares, so that 1 means linear, 2 quadratic and so on (None if there are fewer than two sizes)
+def exponent(sizes, seconds):
+    points = [(math.log(n), math.log(t)) for (n, t) in zip(sizes, seconds) if n > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    meanX = sum(x for (x, y) in points) / len(points)
+    meanY = sum(y for (x, y) in points) / len(points)
+    spread = sum((x - meanX) ** 2 for (x, y) in points)
+    if spread == 0:
+        return None
+    return sum((x - meanX) * (y - meanY) for (x, y) in points) / spread
+
+#this function runs the benchmarks whose names contain one of the 'only' strings (all of them if 'only' is empty) for each
+#size in turn; once a size exceeds the time limit the larger sizes of that benchmark are skipped
+def run(options):
+    sl = loadModule(options.module)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * max(options.sizes) + 1000))
+    results = {}
+    for (name, setup) in benchmarks(sl, options.seed):
+        if options.only and not any(part in name for part in options.only):
+            continue
+        entry = {'sizes': [], 'seconds': [], 'limit': None}
+        for n in options.sizes:
+            try:
+                function = setup(n)
+                seconds = measure(function, options.repeat, options.limit)
+            except (TimeLimit, RecursionError) as error:
+                entry['limit'] = {'size': n, 'reason': 'time limit' if isinstance(error, TimeLimit) else 'recursion limit'}
+                break
+            entry['sizes'].append(n)
+            entry['seconds'].append(seconds)
+        entry['exponent'] = exponent(entry['sizes'], entry['seconds'])
+        results[name] = entry
+        if not options.quiet:
+            timings = ' '.join('%d:%.3g' % (n, t) for (n, t) in zip(entry['sizes'], entry['seconds']))
+            growth = '' if entry['exponent'] == None else ' (~n^%.2f)' % entry['exponent']
+            stopped = '' if entry['limit'] == None else ' [%s at %d]' % (entry['limit']['reason'], entry['limit']['size'])
+            print ('%-24s %s%s%s' % (name, timings, growth, stopped), file=sys.stderr)
+    report = {'module': os.path.abspath(options.module), 'python': platform.python_version(), 'platform': platform.platform(),
+              'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'seed': options.seed, 'repeat': options.repeat,
+              'benchmarks': results}
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        print ()
+
+#this function compares two reports size by size, printing the ratio of the new time to the old one, and returns the number of
+#regressions (ratios above the threshold, or a limit reached at a smaller size than before)
+def compare(options):
+    with open(options.old) as f:
+        old = json.load(f)['benchmarks']
+    with open(options.new) as f:
+        new = json.load(f)['benchmarks']
+    regressions = 0
+    for name in sorted(set(old) & set(new)):
+        before = dict(zip(old[name]['sizes'], old[name]['seconds']))
+        after = dict(zip(new[name]['sizes'], new[name]['seconds']))
+        ratios = []
+        for n in sorted(set(before) & set(after)):
+            ratio = after[n] / before[n] if before[n] > 0 else float('inf')
+            flag = ''
+            if ratio > options.threshold:
+                flag = '!'
+                regressions += 1
+            ratios.append('%d:%.2fx%s' % (n, ratio, flag))
+        note = ''
+        if new[name]['limit'] and (not old[name]['limit'] or new[name]['limit']['size'] < old[name]['limit']['size']):
+            note = ' [new limit at %d]' % new[name]['limit']['size']
+            regressions += 1
+        elif old[name]['limit'] and not new[name]['limit']:
+            note = ' [old limit at %d]' % old[name]['limit']['size']
+        print ('%-24s %s%s' % (name, ' '.join(ratios), note))
+    for name in sorted(set(old) ^ set(new)):
+        print ('%-24s only in %s' % (name, options.old if name in old else options.new))
+    return regressions
+
+def main(arguments):
+    parser = argparse.ArgumentParser(description='Benchmarks for Sentential-Logic.py.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    runner = commands.add_parser('run', help='run the benchmarks and write a JSON report')
+    runner.add_argument('--module', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Sentential-Logic.py'),
+                        help='the version of Sentential-Logic.py to benchmark')
+    runner.add_argument('--sizes', type=lambda s: [int(n) for n in s.split(',')], default=[16, 64, 256, 1024, 4096, 16384],
+                        help='comma-separated input sizes')
+    runner.add_argument('--repeat', type=int, default=3, help='the number of timings to take the best of')
+    runner.add_argument('--limit', type=float, default=5.0, help='the time limit in seconds for a single call')
+    runner.add_argument('--only', action='append', default=[], help='run only benchmarks whose names contain this (repeatable)')
+    runner.add_argument('--seed', type=int, default=0, help='the seed for the random formulas')
+    runner.add_argument('-o', '--output', help='the file to write the report to (standard output by default)')
+    runner.add_argument('-q', '--quiet', action='store_true', help='do not print the timings while running')
+    comparer = commands.add_parser('compare', help='compare two reports')
+    comparer.add_argument('old', help='the report to compare against')
+    comparer.add_argument('new', help='the new report')
+    comparer.add_argument('--threshold', type=float, default=1.25, help='the slowdown ratio counted as a regression')
+    options = parser.parse_args(arguments)
+    if options.command == 'run':
+        run(options)
+    elif compare(options):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,28 @@
+#Sentential-Logic.py cannot be imported by name (it has a hyphen in it), so the tests load it from its path as the module 'sl'
+import importlib.util
+import os
+import sys
+
+import pytest
+
+path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Sentential-Logic.py')
+spec = importlib.util.spec_from_file_location('sl', path)
+module = importlib.util.module_from_spec(spec)
+sys.modules['sl'] = module
+spec.loader.exec_module(module)
+
+@pytest.fixture
+def sl():
+    return module
+
+#this fixture returns a function making a random formula (with every connective except ':') over the given atomic formulas, as
+#text, from a random.Random so that the tests are repeatable
+@pytest.fixture
+def randomFormula():
+    def make(rng, names, depth):
+        if depth == 0 or rng.random() < 0.2:
+            return rng.choice(names + ['T', 'F'] if rng.random() < 0.1 else names)
+        if rng.random() < 0.25:
+            return '~' + make(rng, names, depth - 1)
+        return '(%s %s %s)' % (make(rng, names, depth - 1), rng.choice('^v>='), make(rng, names, depth - 1))
+    return make
@@ -0,0 +1,61 @@
+import pickle
+import random
+
+import pytest
+
+names = ['p', 'q', 'r']
+
+def test_store_and_rebuild(sl, randomFormula):
+    rng = random.Random(13)
+    arena = sl.FormulaArena()
+    for n in range(200):
+        formula = sl.parseText(randomFormula(rng, names, 5))
+        node = arena.store(formula)
+        assert node.toFormula() is formula
+        assert str(node) == str(formula)
+        #parsing straight into the arena gives the same formula
+        assert arena.parse(sl.tokenize(str(formula))).toFormula() is formula
+    copy = pickle.loads(pickle.dumps(arena))
+    assert [copy.text(i) for i in range(len(copy))] == [arena.text(i) for i in range(len(arena))]
+
+def test_evaluate_agrees_with_eval(sl, randomFormula):
+    rng = random.Random(31)
+    arena = sl.FormulaArena()
+    for n in range(200):
+        formula = sl.parseText(randomFormula(rng, names, 6))
+        env = dict((name, rng.random() < 0.5) for name in names)
+        assert arena.store(formula).eval(dict(env)) == formula.eval(dict(env))
+
+#the arena evaluates in the same order as eval, so an assignment affects what comes after it
+def test_evaluate_assignments(sl):
+    arena = sl.FormulaArena()
+    env = {'p': False}
+    assert arena.store(sl.parseText('((p : T) v p)')).eval(env) == True
+    assert env == {'p': True}
+    env = {}
+    assert arena.parse(sl.tokenize('(q : ~(T ^ F))')).eval(env) == None
+    assert env == {'q': True}
+
+@pytest.mark.parametrize('text', ['((p ^ q) : T)', '(~p : F)', '(T : F)'])
+def test_assignment_to_non_variable_is_rejected(sl, text):
+    arena = sl.FormulaArena()
+    with pytest.raises(ValueError):
+        arena.parse(sl.tokenize(text))
+    with pytest.raises(ValueError):
+        arena.store(sl.parseText(text))
+
+def test_deep_formula(sl):
+    arena = sl.FormulaArena()
+    node = arena.parse(sl.tokenize('~' * 5000 + '(p ^ q)'))
+    assert node.eval({'p': True, 'q': True}) == True
+    assert node.toFormula() is sl.parseText('~' * 5000 + '(p ^ q)')
+
+#formulas stored with the same 'keys' share their nodes, without the dictionary holding on to the formulas
+def test_store_with_keys_shares_nodes(sl):
+    arena = sl.FormulaArena()
+    keys = {}
+    first = arena.store(sl.parseText('(p ^ ~q)'), keys=keys)
+    second = arena.store(sl.parseText('~(p ^ ~q)'), keys=keys)
+    assert len(arena) == 5
+    assert second.formula.index == first.index
+    assert all(type(n) == int for key in keys for n in key)
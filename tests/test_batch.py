@@ -0,0 +1,33 @@
+import io
+import pytest
+
+formulas = ['~p', '(q ^ ~p)', '(q v p)', '(p > q)']
+
+def results(sl, lines, format):
+    parsed = [sl.parseText(text) for text in formulas]
+    return list(sl.evaluateMany(parsed, sl.readAssignments(lines, format)))
+
+def test_csv_and_jsonl_agree_on_missing_values(sl):
+    csv = ['p,q\n', ',T\n', 'T,\n', 'F,T\n']
+    jsonl = ['{"p": null, "q": true}\n', '{"p": true, "q": null}\n', '{"p": false, "q": true}\n']
+    assert results(sl, csv, 'csv') == results(sl, jsonl, 'jsonl') == \
+        [[None, None, None, None], [False, None, None, None], [True, True, True, True]]
+
+def test_compiled_negation_of_unknown(sl):
+    compiled = sl.compileFormula(sl.parseText('~~p'))
+    assert compiled({'p': None}) == None
+    assert compiled({'p': None}) == sl.parseText('~~p').eval({'p': None})
+
+#an assignment has no truth-value to put in a row, so it is rejected (by name) before anything is read or written
+def test_assignments_are_rejected(sl, tmp_path, capsys):
+    parsed = [sl.parseText('p'), sl.parseText('(q ^ (p : T))')]
+    rows = sl.readAssignments(['p,q\n', 'T,T\n'], 'csv')
+    with pytest.raises(ValueError, match=r'\(q \^ \(p : T\)\)'):
+        sl.evaluateMany(parsed, rows)
+    path = tmp_path / 'data.csv'
+    path.write_text('p,q\nT,T\n')
+    with pytest.raises(SystemExit):
+        sl.main(['evaluate', '-f', 'p', '-f', '(p : T)', str(path)])
+    captured = capsys.readouterr()
+    assert captured.out == ''
+    assert '(p : T) contains an assignment' in captured.err
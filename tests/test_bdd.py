@@ -0,0 +1,58 @@
+import random
+
+names = ['p', 'q', 'r', 's', 't']
+
+#the models of a formula over 'names' according to the truth-table engine, as a set of tuples of truth-values
+def tableModels(sl, formula):
+    return set(tuple(env[name] for name in names) for (env, value) in sl.truthTable(formula, names) if value)
+
+def bddModels(bdd, u):
+    return set(tuple(env[name] for name in names) for env in bdd.models(u, names))
+
+def test_bdd_agrees_with_truth_tables(sl, randomFormula):
+    rng = random.Random(8)
+    bdd = sl.BDD(names)
+    for n in range(200):
+        formula = sl.parseText(randomFormula(rng, names, 5))
+        u = bdd.toBdd(formula)
+        models = tableModels(sl, formula)
+        assert bdd.countModels(u) == len(models)
+        assert bddModels(bdd, u) == models
+
+#equivalent formulas get the same node, also when the cache of apply is much too small to hold every result
+def test_equivalent_formulas_share_a_node(sl, randomFormula):
+    for cacheSize in [1 << 16, 3]:
+        bdd = sl.BDD(names, cacheSize)
+        pairs = [('(p > q)', '(~p v q)'), ('~(p ^ (q v r))', '(~p v (~q ^ ~r))'), ('(p = q)', '((p ^ q) v (~p ^ ~q))'),
+                 ('(p v ~p)', 'T'), ('((p > q) ^ (q > p))', '(q = p)')]
+        for (a, b) in pairs:
+            assert bdd.toBdd(sl.parseText(a)) == bdd.toBdd(sl.parseText(b))
+        assert bdd.toBdd(sl.parseText('(p > q)')) != bdd.toBdd(sl.parseText('(q > p)'))
+        assert len(bdd.cache) <= cacheSize
+        rng = random.Random(cacheSize)
+        for n in range(50):
+            formula = sl.parseText(randomFormula(rng, names, 5))
+            assert bdd.countModels(bdd.toBdd(formula)) == len(tableModels(sl, formula))
+
+#with the order a1, a2, a3, b1, b2, b3 this formula needs exponentially many nodes, and with a1, b1, a2, b2, ... only a few
+def test_reorder_keeps_functions_and_shrinks_diagram(sl, randomFormula):
+    order = ['a1', 'a2', 'a3', 'b1', 'b2', 'b3']
+    bdd = sl.BDD(order)
+    formula = sl.parseText('(((a1 ^ b1) v (a2 ^ b2)) v (a3 ^ b3))')
+    roots = [bdd.toBdd(formula)]
+    rng = random.Random(3)
+    others = [sl.parseText(randomFormula(rng, order, 4)) for n in range(20)]
+    roots += [bdd.toBdd(other) for other in others]
+    before = [set(tuple(sorted(env.items())) for env in bdd.models(u, order)) for u in roots]
+    size = bdd.size()
+    bdd.reorder()
+    assert bdd.size() <= size
+    assert [set(tuple(sorted(env.items())) for env in bdd.models(u, order)) for u in roots] == before
+    assert bdd.countModels(roots[0]) == sl.countModels(formula)
+    #the diagram is still canonical under the new order
+    assert bdd.toBdd(sl.parseText('(((b3 ^ a3) v (b2 ^ a2)) v (b1 ^ a1))')) == roots[0]
+    alone = sl.BDD(order)
+    alone.toBdd(formula)
+    small = alone.size()
+    alone.reorder()
+    assert alone.size() < small
@@ -0,0 +1,40 @@
+import pytest
+
+def test_hits_and_misses(sl):
+    cache = sl.ParseCache()
+    formula = cache.parse('(p ^ ~q)')
+    assert cache.stats() == {'hits': 0, 'misses': 1, 'entries': 1, 'size': 4096}
+    assert cache.parse('(p ^ ~q)') is formula
+    assert cache.parse('( p^ ~ q )') is formula
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'entries': 1, 'size': 4096}
+    #formulas that are not well-formed count as misses but are not cached
+    for n in range(2):
+        with pytest.raises(sl.ParseError):
+            cache.parse('(p ^')
+    assert cache.stats() == {'hits': 2, 'misses': 3, 'entries': 1, 'size': 4096}
+    cache.clear()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'entries': 0, 'size': 4096}
+
+def test_least_recently_used_is_evicted(sl):
+    cache = sl.ParseCache(size=3)
+    for text in ['p', 'q', 'r']:
+        cache.parse(text)
+    #using 'p' again makes 'q' the least recently used, so 's' takes its place
+    cache.parse('p')
+    cache.parse('s')
+    assert list(cache.entries) == ['r', 'p', 's']
+    assert cache.stats()['entries'] == 3
+    cache.parse('q')
+    assert list(cache.entries) == ['p', 's', 'q']
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 5
+
+#the same characters can make up different tokens, and the cache must keep those apart
+def test_keys_follow_tokens(sl):
+    cache = sl.ParseCache()
+    assert str(cache.parse('(p1 ^ q)')) == '(p1 ^ q)'
+    with pytest.raises(sl.ParseError):
+        cache.parse('(p 1 ^ q)')
+    assert str(cache.parse('(p ^ q1)')) == '(p ^ q1)'
+    assert str(cache.parse('(T v F)')) == '(T v F)'
+    assert cache.parse('(TvF)') is cache.parse('(T v F)')
+    assert cache.stats()['misses'] == 4 and cache.stats()['entries'] == 3
@@ -0,0 +1,97 @@
+import gc
+import io
+import weakref
+import pytest
+
+def test_save_archive_does_not_keep_formulas_alive(sl, tmp_path):
+    #each formula read from the corpus should be freed once saveArchive has stored it
+    alive = []
+    def formulas():
+        for (line, column, formula) in sl.readFormulas(io.StringIO(''.join('(p%d ^ ~q%d)\n' % (n, n) for n in range(200)))):
+            alive.append(weakref.ref(formula))
+            yield formula
+    path = str(tmp_path / 'corpus.slar')
+    sl.saveArchive(path, formulas())
+    gc.collect()
+    assert not any(ref() is not None for ref in alive)
+    with sl.openArchive(path) as archive:
+        assert [str(archive.formula(n)) for n in (0, 199)] == ['(p0 ^ ~q0)', '(p199 ^ ~q199)']
+
+def test_save_archive_shares_nodes_between_formulas(sl, tmp_path):
+    path = str(tmp_path / 'shared.slar')
+    formulas = [sl.parseText('(p ^ q)'), sl.parseText('~(p ^ q)'), sl.parseText('(p ^ q)')]
+    sl.saveArchive(path, formulas)
+    with sl.openArchive(path) as archive:
+        assert len(archive) == 4
+        assert [archive.formula(n).toFormula() for n in range(3)] == formulas
+
+def test_save_archive_round_trips_proofs(sl, tmp_path):
+    path = str(tmp_path / 'proofs.slar')
+    proofs = []
+    for script in ['(p > q)\nAssume, ~q\nAssume, p\n>E, 2, 0\nFI, 3, 1\n~I, 2, 4\n>I, 1, 3\nAssume, r\n', 'p\nR, 0\n']:
+        (valid, message, proof) = sl.checkProof(script)
+        assert valid
+        proofs.append(proof)
+    proofs.append(sl.Proof())
+    formulas = [sl.parseText('~p')]
+    sl.saveArchive(path, formulas, proofs)
+    with sl.openArchive(path) as archive:
+        assert archive.proofCount() == 3
+        assert archive.formula(0).toFormula() is formulas[0]
+        for (n, proof) in enumerate(proofs):
+            copy = archive.proof(n)
+            assert copy.lines == proof.lines
+            assert (copy.open, copy.size, str(copy)) == (proof.open, proof.size, str(proof))
+    assert str(proofs[0]) == '[[(p > q)], [[~q], [[p], q, F], ~p], (~q > ~p), [r]]'
+
+def test_open_archive_rejects_other_files(sl, tmp_path):
+    path = str(tmp_path / 'formulas.slar')
+    sl.saveArchive(path, [sl.parseText('(p ^ q)')])
+    with open(path, 'rb') as f:
+        data = f.read()
+    for (name, content, message) in [('magic.slar', b'SLAX' + data[4:], 'is not a formula archive'),
+                                     ('version.slar', data[:4] + b'\x02\0\0\0' + data[8:], 'unsupported archive version 2'),
+                                     ('short.slar', data[:10], 'is not a formula archive')]:
+        other = str(tmp_path / name)
+        with open(other, 'wb') as f:
+            f.write(content)
+        with pytest.raises(ValueError, match=message):
+            sl.openArchive(other)
+
+def test_evaluate_entries(sl):
+    #as in evaluateMany, a formula with an unassigned atomic formula has no truth-value even if eval would not need it
+    text = '(p ^ q), ~p\n(p v q), (p v r), (p : F)\n((p : F) v q)\n'
+    env = {'p': True, 'q': False}
+    results = list(sl.evaluateEntries(sl.readFormulas(io.StringIO(text)), env))
+    assert results == [(1, 1, False), (1, 10, False), (2, 1, True), (2, 10, None), (2, 19, None), (3, 1, None)]
+    assert env == {'p': True, 'q': False}
+
+def test_evaluate_entries_on_deep_formula(sl):
+    #the parser handles any depth, and so must the evaluation which follows it
+    text = '~' * 3000 + 'p\n'
+    assert list(sl.evaluateEntries(sl.readFormulas(io.StringIO(text)), {'p': True})) == [(1, 1, True)]
+
+def test_corpus_command_evaluates_deep_formula(sl, tmp_path, capsys):
+    path = tmp_path / 'deep.txt'
+    path.write_text('~' * 3001 + 'p\n')
+    sl.main(['corpus', str(path), '-a', 'p=T'])
+    assert capsys.readouterr().out == '1:1 False\n'
+
+#an assignment, even one nested inside a formula, is neither valid, contingent nor unsatisfiable
+def test_classify_entries_reports_assignments(sl):
+    text = '(p v ~p), ((p : T) ^ q)\n~(q : F), (p ^ ~p)\n'
+    with pytest.raises(ValueError, match='line 1, column 11'):
+        list(sl.classifyEntries(sl.readFormulas(io.StringIO(text))))
+    errors = []
+    results = list(sl.classifyEntries(sl.readFormulas(io.StringIO(text)), errors.append))
+    assert results == [(1, 1, 'valid'), (2, 11, 'unsatisfiable')]
+    assert ['line 1, column 11' in str(errors[0]), 'line 2, column 1' in str(errors[1])] == [True, True]
+
+def test_corpus_command_classify_keeps_going(sl, tmp_path, capsys):
+    path = tmp_path / 'corpus.txt'
+    path.write_text('(p v q), ((p : T) ^ q), ~(q : F)\n')
+    with pytest.raises(SystemExit):
+        sl.main(['corpus', str(path), '--classify', '--keep-going'])
+    captured = capsys.readouterr()
+    assert captured.out == '1:1 contingent\n'
+    assert captured.err.count('contains an assignment') == 2
@@ -0,0 +1,35 @@
+import gc
+import pickle
+import random
+import weakref
+
+names = ['p', 'q', 'r']
+
+def test_equal_formulas_are_identical(sl, randomFormula):
+    p = sl.Variable('p')
+    assert sl.parseText('(p ^ ~q)') is sl.And(p, sl.Not(sl.Variable('q')))
+    assert sl.Variable('p') is p and sl.TruthValue(True) is sl.TruthValue(1)
+    assert sl.And(p, p) is not sl.Or(p, p)
+    rng = random.Random(3)
+    for n in range(200):
+        text = randomFormula(rng, names, 6)
+        formula = sl.parseText(text)
+        assert sl.parseTokens(sl.tokenize(text)) is formula
+        assert hash(formula) == hash(sl.parseText(str(formula)))
+        assert pickle.loads(pickle.dumps(formula)) is formula
+        assert {formula: n}[sl.parseText(text)] == n
+
+def test_unused_formulas_are_freed(sl):
+    formula = sl.parseTokens(sl.tokenize('((s ^ ~t) > (t v s))'))
+    ref = weakref.ref(formula)
+    left = weakref.ref(formula.left)
+    del formula
+    gc.collect()
+    assert ref() is None and left() is None
+    #the tables only keep entries for formulas still in use (and at most as many again that are waiting to be swept)
+    before = len(sl.formulaTable) + len(sl.negationTable) + len(sl.variableTable)
+    for n in range(50000):
+        sl.Not(sl.And(sl.Variable('x%d' % n), sl.Variable('y')))
+    gc.collect()
+    after = len(sl.formulaTable) + len(sl.negationTable) + len(sl.variableTable)
+    assert after < 2 * before + 3 * 2048
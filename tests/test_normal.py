@@ -0,0 +1,67 @@
+import random
+
+names = ['p', 'q', 'r', 's']
+
+def isLiteral(sl, formula):
+    return type(formula) == sl.Variable or (type(formula) == sl.Not and type(formula.formula) == sl.Variable)
+
+#the parts of a formula joined by the connective cls, e.g. the conjuncts of a conjunction
+def parts(sl, formula, cls):
+    stack = [formula]
+    found = []
+    while stack:
+        node = stack.pop()
+        if type(node) == cls:
+            stack += [node.right, node.left]
+        else:
+            found.append(node)
+    return found
+
+def isNnf(sl, formula):
+    return all(isLiteral(sl, part) or (type(part) in (sl.And, sl.Or) and isNnf(sl, part.left) and isNnf(sl, part.right))
+               for part in [formula])
+
+#a CNF is a conjunction of clauses which are disjunctions of literals (and a DNF the other way round), or just T or F
+def isNormal(sl, formula, outer, inner):
+    if type(formula) == sl.TruthValue:
+        return True
+    return all(all(isLiteral(sl, literal) for literal in parts(sl, clause, inner)) for clause in parts(sl, formula, outer))
+
+def equivalent(sl, a, b):
+    return sl.isValid(sl.Bicond(a, b))
+
+def test_normal_forms_are_equivalent_and_well_shaped(sl, randomFormula):
+    rng = random.Random(21)
+    for n in range(300):
+        formula = sl.parseText(randomFormula(rng, names, 5))
+        nnf = sl.toNnf(formula)
+        cnf = sl.toCnf(formula)
+        dnf = sl.toDnf(formula)
+        assert type(nnf) == sl.TruthValue or isNnf(sl, nnf)
+        assert isNormal(sl, cnf, sl.And, sl.Or)
+        assert isNormal(sl, dnf, sl.Or, sl.And)
+        for result in [nnf, cnf, dnf]:
+            assert equivalent(sl, formula, result)
+
+def test_simplifications(sl):
+    assert str(sl.toCnf(sl.parseText('((p ^ q) v (p ^ ~q))'))) == 'p'
+    assert str(sl.toCnf(sl.parseText('(p ^ (p v q))'))) == 'p'
+    assert str(sl.toNnf(sl.parseText('~(p > ~q)'))) == '(p ^ q)'
+    assert sl.toCnf(sl.parseText('(p v ~p)')) is sl.TruthValue(True)
+    assert sl.toDnf(sl.parseText('(p ^ ~p)')) is sl.TruthValue(False)
+
+#a definitional CNF is only equisatisfiable, but every one of its models is a model of the formula
+def test_definitional_cnf(sl, randomFormula):
+    rng = random.Random(4)
+    for n in range(150):
+        formula = sl.parseText(randomFormula(rng, names, 5))
+        cnf = sl.toCnf(formula, definitional=True)
+        assert isNormal(sl, cnf, sl.And, sl.Or)
+        #the new atomic formulas make truth tables too large, so the SAT solver checks these
+        assert (sl.findModel(cnf) != None) == sl.isSatisfiable(formula)
+        assert sl.findModel(sl.And(cnf, sl.Not(formula))) == None
+
+def test_deep_formula(sl):
+    formula = sl.parseText('~' * 5001 + '(p ^ q)')
+    assert str(sl.toNnf(formula)) == '(~p v ~q)'
+    assert str(sl.toCnf(formula)) == '(~p v ~q)'
@@ -0,0 +1,58 @@
+import pytest
+
+depth = 100000
+
+def test_deep_negations(sl):
+    text = '~' * depth + 'p'
+    formula = sl.parseTokens(sl.tokenize(text))
+    node = formula
+    for n in range(depth):
+        assert type(node) == sl.Not
+        node = node.formula
+    assert node is sl.Variable('p')
+    assert str(formula) == text
+
+def test_deep_parentheses(sl):
+    #nested to the left, ((((p ^ q) ^ q) ...) ^ q), and to the right, (p ^ (p ^ (p ^ ... q)))
+    left = sl.parseTokens(sl.tokenize('(' * depth + 'p' + ' ^ q)' * depth))
+    right = sl.parseTokens(sl.tokenize('(p ^ ' * depth + 'q' + ')' * depth))
+    for (formula, branch) in [(left, 'left'), (right, 'right')]:
+        node = formula
+        for n in range(depth):
+            assert type(node) == sl.And
+            node = getattr(node, branch)
+        assert node is sl.Variable('p' if branch == 'left' else 'q')
+    assert sl.parseTokens(sl.tokenize(str(left))) is left
+
+#the offset of a ParseError is the position of the offending token, or the number of tokens if the formula ends too soon
+@pytest.mark.parametrize('text, offset, message', [
+    ('', 0, 'unexpected end of formula'),
+    ('~', 1, 'unexpected end of formula'),
+    ('(p ^', 3, 'unexpected end of formula'),
+    ('(p ^ q', 4, "expected ')'"),
+    ('((p ^ q) v r', 8, "expected ')'"),
+    ('(p ^ q v r)', 4, "expected ')'"),
+    ('(p q)', 2, 'expected a connective'),
+    ('(p)', 2, 'expected a connective'),
+    (')', 0, "unexpected ')'"),
+    ('(p ^ ^ q)', 3, "unexpected '^'"),
+    ('~(~p v ~)', 6, "unexpected ')'"),
+    ('(p ^ q))', 5, 'unexpected text after the end of the formula'),
+    ('(p ^ q) v r', 5, 'unexpected text after the end of the formula'),
+    ('p q', 1, 'unexpected text after the end of the formula'),
+])
+def test_parse_error_offsets(sl, text, offset, message):
+    with pytest.raises(sl.ParseError) as error:
+        sl.parseTokens(sl.tokenize(text))
+    assert (error.value.offset, str(error.value)) == (offset, message)
+    assert sl.errorMessage(error.value) == 'That is not a well-formed formula (%s at token %d).' % (message, offset)
+
+def test_parse_error_offset_in_deep_formula(sl):
+    tokens = sl.tokenize('(' * depth + 'p' + ' ^ q)' * (depth - 1) + ' ^ q')
+    with pytest.raises(sl.ParseError) as error:
+        sl.parseTokens(tokens)
+    assert error.value.offset == len(tokens)
+    tokens = sl.tokenize('~' * depth + ')')
+    with pytest.raises(sl.ParseError) as error:
+        sl.parseTokens(tokens)
+    assert (error.value.offset, str(error.value)) == (depth, "unexpected ')'")
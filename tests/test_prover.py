@@ -0,0 +1,51 @@
+#the consequent of >I may come from before the subproof, as it could before proofs were stored in a Proof
+def test_conditional_introduction_with_earlier_consequent(sl):
+    (valid, message, proof) = sl.checkProof('p\nAssume, q\n>I, 1, 0\n')
+    assert valid and message == None
+    assert str(proof) == '[[p], [[q]], (q > p)]'
+    assert proof.size == 3
+
+def test_conditional_introduction_within_subproof(sl):
+    (valid, message, proof) = sl.checkProof('p\nR, 0\nAssume, q\nR, 0\n>I, 2, 3\n')
+    assert valid
+    assert str(proof) == '[[p], p, [[q], p], (q > p)]'
+
+#a contradiction before the assumption does not close the subproof, which the baseline emptied while dropping its assumption
+def test_negation_introduction_needs_contradiction_in_subproof(sl):
+    (valid, message, proof) = sl.checkProof('p, ~p\nFI, 0, 1\nAssume, q\n~I, 3, 2\n')
+    assert not valid
+    assert 'not an acceptable use of ~I' in message
+    (valid, message, proof) = sl.checkProof('p, ~p\nAssume, q\nFI, 0, 1\n~I, 2, 3\n')
+    assert valid
+    assert str(proof) == '[[p], [~p], [[q], F], ~q]'
+
+#after each step prover prints only what changed: the new line, or which lines were closed into a subproof (and dropped) by ~I 
+#and >I, or which line was deleted; what it prints must agree with the whole proof printed afresh
+def test_prover_prints_changed_lines(sl, capsys):
+    session = sl.ProverSession()
+    session.start('(p > q)')
+    steps = [('Assume, ~q', ['  1  [~q]']),
+             ('Assume, p', ['  2  [p]']),
+             ('>E, 2, 0', ['  3  q']),
+             ('FI, 3, 1', ['  4  F']),
+             ('R, 0', ['  5  (p > q)']),
+             ('R, 1', ['  6  ~q']),
+             ('~I, 2, 4', ['  lines 5-6 deleted', '  lines 2-4 closed into a subproof at line 2', '  3  ~p']),
+             ('R, 0', ['  4  (p > q)']),
+             ('>I, 1, 3', ['  lines 1-4 closed into a subproof at line 1', '  2  (~q > ~p)']),
+             ('Assume, ~(p > q)', ['  3  [~(p > q)]']),
+             ('FI, 0, 3', ['  4  F']),
+             ('R, 0', ['  5  (p > q)']),
+             ('~I, 3, 4', ['  line 5 deleted', '  lines 3-4 closed into a subproof at line 3', '  4  ~~(p > q)']),
+             ('delete', ['  line 4 deleted']),
+             ('R, 0', ['  4  (p > q)'])]
+    capsys.readouterr()
+    for (rule, printed) in steps:
+        assert session.apply(sl.listMaker(rule), lambda: None) == None
+        assert capsys.readouterr().out.splitlines() == printed
+        session.show()
+        shown = capsys.readouterr().out.splitlines()
+        assert len(shown) == len(session.proof)
+        assert printed[-1].startswith('  line ') or printed[-1] in shown
+    assert shown == ['  0  [(p > q)]', '  1  [[~q], [[p], q, F], ~p, (p > q)]', '  2  (~q > ~p)', '  3  [[~(p > q)], F]',
+                     '  4  (p > q)']
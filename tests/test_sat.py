@@ -0,0 +1,52 @@
+import io
+import pytest
+
+#a satisfiable instance in the format of the SATLIB uf* and flat* benchmarks, which end with the lines '%' and '0'
+satlib = '''c This Formular is generated by mcnf
+c
+c    horn? no
+c    forced? no
+c    mixed sat? no
+c    clause length = 3
+c
+p cnf 5  4
+ 1 -2 3 0
+-1 2 -4 0
+2 4 5 0
+-3 -5 1 0
+%
+0
+
+'''
+
+def test_satlib_trailer_is_not_a_clause(sl):
+    (clauses, numVars) = sl.readDimacs(io.StringIO(satlib))
+    assert numVars == 5
+    assert clauses == [[1, -2, 3], [-1, 2, -4], [2, 4, 5], [-3, -5, 1]]
+    model = sl.SatSolver(numVars, clauses).solve()
+    assert model != None
+    assert all(any(model[abs(lit)] == (lit > 0) for lit in clause) for clause in clauses)
+
+def test_sat_command_on_satlib_file(sl, tmp_path, capsys):
+    path = tmp_path / 'uf.cnf'
+    path.write_text(satlib)
+    sl.main(['sat', str(path)])
+    assert capsys.readouterr().out.startswith('s SATISFIABLE')
+
+#None means "no model", so a formula with an assignment (anywhere in it) must raise instead of returning it; nothing is printed
+@pytest.mark.parametrize('text', ['(p : T)', '((p : T) ^ q)', '~(q : F)'])
+def test_assignments_are_rejected(sl, text, capsys):
+    formula = sl.parseText(text)
+    for function in [sl.findModel, sl.findCountermodel, sl.tseitin, sl.compileFormula, sl.toNnf, sl.toCnf, sl.toDnf,
+                     sl.BDD().toBdd]:
+        with pytest.raises(ValueError):
+            function(formula)
+    assert capsys.readouterr().out == ''
+
+def test_bdd_is_unchanged_by_rejected_formula(sl):
+    bdd = sl.BDD()
+    root = bdd.toBdd(sl.parseText('(p ^ q)'))
+    size = bdd.size()
+    with pytest.raises(ValueError):
+        bdd.toBdd(sl.parseText('((p v r) ^ (q : T))'))
+    assert bdd.size() == size and bdd.roots == set([root])
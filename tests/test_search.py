@@ -0,0 +1,34 @@
+import pytest
+
+valid = [([], '(p > p)'), (['(p > q)', 'p'], 'q'), (['(p ^ q)'], '(q ^ p)'), (['(p v q)'], '(q v p)'), (['~~p'], 'p'),
+         (['(p > q)', '~q'], '~p'), ([], '(p v ~p)'), (['(p = q)', 'q'], 'p'), (['(p > q)', '(q > r)'], '(p > r)'),
+         (['p', '~p'], 'q'), ([], '((p ^ q) > (q v r))'), (['(p v q)', '~p'], 'q'), ([], '(~(p ^ q) > (~p v ~q))')]
+
+#every script findProof writes must be accepted by checkProof, and end with the goal
+@pytest.mark.parametrize('premises, goal', valid)
+def test_found_proofs_check(sl, premises, goal):
+    script = sl.findProof([sl.parseText(premise) for premise in premises], sl.parseText(goal), timeLimit=5.0)
+    assert script != None
+    (ok, message, proof) = sl.checkProof(script)
+    assert ok and message == None
+    assert proof.formula(len(proof) - 1) is sl.parseText(goal)
+    assert [proof.formula(n) for n in range(len(premises))] == [sl.parseText(premise) for premise in premises]
+
+@pytest.mark.parametrize('premises, goal', [([], 'p'), (['(p > q)', 'q'], 'p'), ([], '(p > q)'), (['(p v q)'], '(p ^ q)')])
+def test_invalid_sequents_have_no_proof(sl, premises, goal, capsys):
+    assert sl.findProof([sl.parseText(premise) for premise in premises], sl.parseText(goal), timeLimit=5.0) == None
+    assert capsys.readouterr().out == ''
+
+#running out of search nodes or depth is not an error either
+def test_search_limits(sl):
+    goal = sl.parseText('(p v ~p)')
+    assert sl.findProof([], goal, nodeLimit=20) == None
+    assert sl.findProof([], goal, maxDepth=3) == None
+    assert sl.findProof([], goal) != None
+
+def test_prove_command(sl, capsys):
+    sl.main(['prove', '(p > r)', '-p', '(p > q), (q > r)'])
+    assert sl.checkProof(capsys.readouterr().out)[0]
+    with pytest.raises(SystemExit):
+        sl.main(['prove', 'q', '-p', 'p'])
+    assert 'No proof was found.' in capsys.readouterr().err
@@ -0,0 +1,159 @@
+def test_prover_service_size_follows_the_proof(sl):
+    service = sl.ProverService()
+    sl.serviceStep(service, 'p')
+    assert service.size() == 1
+    for n in range(5):
+        sl.serviceStep(service, 'delete')
+    assert service.size() == 0
+    for line in ['Assume: q', 'R, 0', 'Assume: r', 'R, 1', '>I, 2, 3', '>I, 0, 3']:
+        sl.serviceStep(service, line)
+    #every formula counts, including those inside closed subproofs
+    assert str(service.session.proof) == '[[[q], q, [[r], q], (r > q)], (q > (r > q))]'
+    assert service.size() == 6
+    sl.serviceStep(service, 'delete')
+    sl.serviceStep(service, 'delete')
+    assert service.size() == 0
+
+#these tests talk to a server on a local port through asyncio clients, as a user of 'nc' would
+import asyncio
+
+async def connect(server):
+    port = server.sockets[0].getsockname()[1]
+    (reader, writer) = await asyncio.open_connection('127.0.0.1', port)
+    return (reader, writer)
+
+#this function sends a line and returns the lines received up to and including the next prompt
+async def send(reader, writer, line, prompt):
+    writer.write(line.encode('utf-8') + b'\n')
+    await writer.drain()
+    return await receive(reader, prompt)
+
+#this function ends the session with 'exit' and waits for the server to close the connection
+async def close(reader, writer):
+    writer.write(b'exit\n')
+    await writer.drain()
+    await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+
+async def receive(reader, prompt):
+    lines = []
+    while True:
+        line = (await asyncio.wait_for(reader.readline(), 5)).decode('utf-8')
+        if not line:
+            return lines
+        lines.append(line.rstrip('\n'))
+        if line.rstrip('\n') == prompt:
+            return lines
+
+def run(sl, client, **limits):
+    async def main():
+        server = await sl.LogicServer(**limits).start('127.0.0.1', 0)
+        async with server:
+            return await client(server)
+    return asyncio.run(main())
+
+def test_evaluator_session(sl):
+    async def client(server):
+        (reader, writer) = await connect(server)
+        await receive(reader, "Please choose 'evaluator' or 'prover': ")
+        await send(reader, writer, 'evaluator', '%')
+        await send(reader, writer, '(p : T)', '%')
+        await send(reader, writer, '(q : F)', '%')
+        result = await send(reader, writer, '(p > (p ^ q))', '%')
+        await close(reader, writer)
+        return result
+    assert run(sl, client) == ['% False', "   env = {'p': True, 'q': False}", '%']
+
+rule = 'Please apply an inference rule: '
+
+def test_prover_session(sl):
+    async def client(server):
+        (reader, writer) = await connect(server)
+        await receive(reader, "Please choose 'evaluator' or 'prover': ")
+        output = [await send(reader, writer, 'prover', 'Please state the premises: ')]
+        output.append(await send(reader, writer, '(p > q), p', rule))
+        output.append(await send(reader, writer, '>E, 1, 0', rule))
+        output.append(await send(reader, writer, 'vI1, 2', 'Please provide a formula: '))
+        output.append(await send(reader, writer, 'r', rule))
+        output.append(await send(reader, writer, 'vI2, 2: s', rule))
+        output.append(await send(reader, writer, 'show', rule))
+        await close(reader, writer)
+        return output
+    assert run(sl, client) == [
+        ['Please state the premises: '], ['  0  [(p > q)]', '  1  [p]', rule], ['  2  q', rule],
+        ['Please provide a formula: '], ['  3  (q v r)', rule], ['  4  (s v q)', rule],
+        ['  0  [(p > q)]', '  1  [p]', '  2  q', '  3  (q v r)', '  4  (s v q)', rule]]
+
+def test_item_limit_closes_session(sl):
+    async def client(server):
+        (reader, writer) = await connect(server)
+        await receive(reader, "Please choose 'evaluator' or 'prover': ")
+        await send(reader, writer, 'evaluator', '%')
+        await send(reader, writer, '(a : T)', '%')
+        await send(reader, writer, '(b : T)', '%')
+        #the server closes the connection itself
+        result = await send(reader, writer, '(c : T)', '%')
+        writer.close()
+        return result
+    assert run(sl, client, maxItems=2) == ['% None', "   env = {'a': True, 'b': True, 'c': True}",
+                                           'The session was closed because it grew beyond 2 items.']
+
+#an exception while handling an input is reported to the client, whose session goes on
+def test_failing_input_gets_an_error_line(sl, monkeypatch):
+    step = sl.EvaluatorService.step
+    def failing(service, line):
+        if line == 'fail':
+            raise RecursionError('maximum recursion depth exceeded')
+        return step(service, line)
+    monkeypatch.setattr(sl.EvaluatorService, 'step', failing)
+    async def client(server):
+        (reader, writer) = await connect(server)
+        await receive(reader, "Please choose 'evaluator' or 'prover': ")
+        await send(reader, writer, 'evaluator', '%')
+        output = [await send(reader, writer, 'fail', '%')]
+        output.append(await send(reader, writer, '(T v ~T)', '%'))
+        await close(reader, writer)
+        return output
+    assert run(sl, client) == [['That input could not be handled (RecursionError: maximum recursion depth exceeded).', '%'],
+                               ['% True', '   env = {}', '%']]
+
+#a slow input in one session does not hold up the others, and each session gets only its own output
+def test_slow_input_does_not_stall_other_sessions(sl, monkeypatch):
+    import threading
+    release = threading.Event()
+    step = sl.EvaluatorService.step
+    def slow(service, line):
+        if line == 'slow':
+            print ('started')
+            release.wait(10)
+            print ('finished')
+            return '%'
+        return step(service, line)
+    monkeypatch.setattr(sl.EvaluatorService, 'step', slow)
+    async def client(server):
+        (reader, writer) = await connect(server)
+        await receive(reader, "Please choose 'evaluator' or 'prover': ")
+        await send(reader, writer, 'evaluator', '%')
+        writer.write(b'slow\n')
+        await writer.drain()
+        (other, otherWriter) = await connect(server)
+        await receive(other, "Please choose 'evaluator' or 'prover': ")
+        await send(other, otherWriter, 'evaluator', '%')
+        output = [await send(other, otherWriter, '(T ^ ~F)', '%')]
+        release.set()
+        output.append(await receive(reader, '%'))
+        await close(other, otherWriter)
+        await close(reader, writer)
+        return output
+    assert run(sl, client) == [['% True', '   env = {}', '%'], ['started', 'finished', '%']]
+
+#formulas made at the same time in several threads are still shared
+def test_formulas_are_shared_between_threads(sl):
+    import concurrent.futures
+    texts = ['(p%d ^ (q v ~p%d))' % (n % 50, n % 50) for n in range(2000)]
+    def build(texts):
+        return [sl.parseTokens(sl.tokenize(text)) for text in texts]
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(build, [texts] * 8))
+    for formulas in results[1:]:
+        assert all(a is b for (a, b) in zip(results[0], formulas))
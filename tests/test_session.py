@@ -0,0 +1,48 @@
+def test_watch_keeps_values_up_to_date(sl):
+    session = sl.Session()
+    session.assign('p', True)
+    session.assign('q', False)
+    formula = sl.parseText('(p ^ ~q)')
+    assert session.watch(formula) == True
+    assert session.assign('q', True) == [formula]
+    assert session.values[formula] == False
+
+#a formula whose assignment is only reached after some of its subformulas must not leave those subformulas behind, where later 
+#assignments would keep recomputing them
+def test_rejected_watch_leaves_session_unchanged(sl, capsys):
+    session = sl.Session()
+    session.assign('p', True)
+    watched = sl.parseText('(p v r)')
+    session.watch(watched)
+    before = (dict(session.values), dict((node, list(parents)) for (node, parents) in session.parents.items()),
+              dict(session.height), list(session.watched))
+    assert session.watch(sl.parseText('((p ^ (q v s)) ^ (q : T))')) == None
+    assert 'Assignments cannot be watched.' in capsys.readouterr().out
+    assert (session.values, session.parents, session.height, session.watched) == before
+    assert session.assign('q', True) == []
+    assert session.assign('s', True) == []
+    assert not sl.Variable('q') in session.values
+
+#the evaluator works without recursion, so a formula nested deeper than Python's recursion limit is evaluated like any other
+def test_evaluator_handles_deep_formulas(sl, capsys):
+    session = sl.Session()
+    depth = 100000
+    sl.evaluatorStep(session, '(p : ' + '~' * depth + 'T)')
+    sl.evaluatorStep(session, '~' * (depth + 1) + '(p ^ q)')
+    sl.evaluatorStep(session, '(q : ~' + '~' * depth + 'p)')
+    sl.evaluatorStep(session, '~' * depth + '(p ^ ~q)')
+    assert capsys.readouterr().out.splitlines() == [
+        '% None', "   env = {'p': True}",
+        'Atomic formula q has not been assigned a truth-value.', '% None', "   env = {'p': True}",
+        '% None', "   env = {'p': True, 'q': False}",
+        '% True', "   env = {'p': True, 'q': False}"]
+
+def test_evaluator_rejects_misplaced_assignments(sl, capsys):
+    session = sl.Session()
+    for e in ['((p : T) ^ p)', '(~p : T)', '(p : (q : T))', '(p : q)']:
+        sl.evaluatorStep(session, e)
+    assert capsys.readouterr().out.splitlines() == [
+        'Assignments cannot be part of a larger formula.', '   env = {}',
+        'Only an atomic formula can be assigned a truth-value, e.g. (p : T) or (p : ~q).', '   env = {}',
+        'Assignments cannot be part of a larger formula.', '   env = {}',
+        'Atomic formula q has not been assigned a truth-value.', '   env = {}']
@@ -0,0 +1,61 @@
+import os
+import pstats
+import re
+
+import pytest
+
+@pytest.fixture
+def instrumented(sl):
+    sl.stats.reset()
+    yield sl
+    sl.disableInstrumentation()
+    sl.stats.reset()
+
+sample = re.compile(r'^([a-z_]+)\{name="((?:[^"\\]|\\.)*)"\} (\S+)$')
+
+def test_prometheus_text_is_well_formed(instrumented):
+    sl = instrumented
+    sl.enableInstrumentation()
+    sl.parseTokens(sl.tokenize('((p ^ q) > ~r)')).eval({'p': True, 'q': True, 'r': False})
+    sl.disableInstrumentation()
+    text = sl.prometheusText()
+    assert text.endswith('\n')
+    (declared, seen) = ({}, {})
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            (metric, description) = line[len('# HELP '):].split(' ', 1)
+            assert description and not metric in declared
+            declared[metric] = None
+        elif line.startswith('# TYPE '):
+            (metric, kind) = line[len('# TYPE '):].split(' ')
+            assert metric in declared and declared[metric] == None and kind in ['counter', 'gauge']
+            declared[metric] = kind
+        else:
+            match = sample.match(line)
+            assert match, line
+            #every sample follows the HELP and TYPE lines of its metric, and counters are named '..._total'
+            assert declared.get(match.group(1)) != None
+            assert declared[match.group(1)] == 'gauge' or match.group(1).endswith('_total')
+            assert float(match.group(3)) >= 0
+            seen.setdefault(match.group(1), set()).add(match.group(2))
+    assert set(seen) == set(declared) and len(declared) == 4
+    assert seen['sentential_calls_total'] >= {'tokenize', 'parseTokens', 'eval Implies', 'eval Variable'}
+    assert 'sentential_calls_total{name="eval Not"} 1' in text.splitlines()
+
+def test_prometheus_labels_are_escaped(sl):
+    entry = {'calls': 2, 'failures': 1, 'seconds': 0.5, 'max': 0.25}
+    lines = sl.prometheusText({'say "hi" \\ now': entry}).splitlines()
+    assert 'sentential_calls_total{name="say \\"hi\\" \\\\ now"} 2' in lines
+    assert 'sentential_seconds_max{name="say \\"hi\\" \\\\ now"} 0.25' in lines
+
+def test_stats_written_only_when_enabled(instrumented, tmp_path):
+    sl = instrumented
+    path = str(tmp_path / 'stats.prof')
+    sl.main(['normal', '(p > q)'])
+    assert sl.stats.snapshot() == {} and os.listdir(str(tmp_path)) == []
+    assert not hasattr(sl.tokenize, '__wrapped__')
+    sl.main(['--stats', path, '--stats-format', 'pstats', 'normal', '(p > q)'])
+    assert os.listdir(str(tmp_path)) == ['stats.prof']
+    profile = pstats.Stats(path).stats
+    assert profile[('sentential', 0, 'tokenize')][:2] == (1, 1)
+    assert profile[('sentential', 0, 'parseTokens')][:2] == (1, 1)
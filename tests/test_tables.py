@@ -0,0 +1,20 @@
+import pytest
+
+def test_truth_tables(sl):
+    formula = sl.parseText('((p > q) ^ ~q)')
+    assert sl.countModels(formula) == 1
+    assert sl.isSatisfiable(formula)
+    assert not sl.isValid(formula)
+    assert sl.isValid(sl.parseText('(p v ~p)'))
+
+#an assignment has no truth table, which must not be mistaken for a table with no rows
+@pytest.mark.parametrize('text', ['(p : T)', '~(p : T)', '((p : T) ^ q)'])
+def test_assignments_have_no_truth_table(sl, text):
+    formula = sl.parseText(text)
+    for function in [sl.countModels, sl.isValid, sl.isSatisfiable]:
+        with pytest.raises(ValueError):
+            function(formula)
+        with pytest.raises(ValueError):
+            function(formula, workers=2)
+    with pytest.raises(ValueError):
+        list(sl.truthTable(formula))
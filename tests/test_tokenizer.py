@@ -0,0 +1,34 @@
+import io
+import time
+
+def test_tokenize_file_matches_tokenize(sl):
+    text = '(pé ^ (q1 v ~rr)) (longname > T)' * 50
+    expected = sl.tokenize(text)
+    for size in (1, 2, 3, 7, 64):
+        assert list(sl.tokenizeFile(io.StringIO(text), size)) == expected
+        assert list(sl.tokenizeFile(io.BytesIO(text.encode('utf-8')), size)) == expected
+    assert list(sl.tokenizeFile(text.encode('utf-8'))) == expected
+
+def test_tokenize_file_with_character_split_across_chunks(sl):
+    #'é' is two bytes in UTF-8, so a chunk of 3 bytes ends in the middle of it
+    data = '(pé ^ q)'.encode('utf-8')
+    assert list(sl.tokenizeFile(io.BytesIO(data), 3)) == ['(', 'pé', '^', 'q', ')']
+
+def best(function, repeat=3):
+    times = []
+    for n in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def test_tokenizing_scales_linearly(sl):
+    #a scaled-down version of the 1 KB to 100 MB check, from 4 KB to 4 MB: the time per byte should stay about the same at every
+    #size (with a quadratic tokenizer it would grow a thousandfold), and the bound leaves room for noisy timings
+    unit = '(p ^ (q v ~r)) '
+    sizes = [4 * 1024, 64 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+    inputs = [(unit * (size // len(unit))).encode('utf-8') for size in sizes]
+    tokenizers = [lambda data: sl.tokenize(data.decode('utf-8')), lambda data: list(sl.tokenizeFile(io.BytesIO(data), 1 << 16))]
+    for tokenizer in tokenizers:
+        rates = [best(lambda: tokenizer(data)) / len(data) for data in inputs]
+        assert max(rates) < 3 * min(rates)